@@ -0,0 +1,152 @@
+"""
+MIT License
+
+Copyright (c) 2017 TrustyJAID
+
+Permission is hereby granted, free of charge, to any person obtaining a copy
+of this software and associated documentation files (the "Software"), to deal
+in the Software without restriction, including without limitation the rights
+to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+copies of the Software, and to permit persons to whom the Software is
+furnished to do so, subject to the following conditions:
+
+The above copyright notice and this permission notice shall be included in all
+copies or substantial portions of the Software.
+
+THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE
+SOFTWARE.
+"""
+
+from typing import Dict, List, Optional, Sequence, Tuple
+
+import tekore
+from redbot.core.utils.chat_formatting import humanize_timedelta
+from tabulate import tabulate
+
+from .helpers import MODE, PITCH
+
+try:
+    import numpy as np
+
+    NUMPY = True
+except ImportError:
+    NUMPY = False
+
+SPARKS = "▁▂▃▄▅▆▇█"
+
+# (attribute, histogram range, bins)
+SUMMARY_FEATURES: Tuple[Tuple[str, Tuple[float, float], int], ...] = (
+    ("energy", (0.0, 1.0), 10),
+    ("danceability", (0.0, 1.0), 10),
+    ("valence", (0.0, 1.0), 10),
+    ("tempo", (60.0, 200.0), 14),
+)
+
+
+def sparkline(counts: "np.ndarray") -> str:
+    if not counts.any():
+        return " " * len(counts)
+    levels = np.ceil(counts / counts.max() * (len(SPARKS) - 1)).astype(int)
+    return "".join(SPARKS[i] for i in levels)
+
+
+class PlaylistStats:
+    """
+    Summary statistics of the audio features of a group of tracks
+
+    Batches of features are added as they arrive from Spotify and only
+    their numbers are kept, one small array per feature per batch. The
+    arrays are joined once when the stats are read and everything after
+    that is done with NumPy so the cost barely changes between a 20
+    track playlist and a 10,000 track one.
+    """
+
+    COLUMNS: Tuple[Tuple[str, type], ...] = tuple(
+        (attr, float) for attr, _range, _bins in SUMMARY_FEATURES
+    ) + (("key", int), ("mode", int), ("duration_ms", float))
+
+    def __init__(self, features: Optional[Sequence[tekore.model.AudioFeatures]] = None):
+        self.count = 0
+        self._batches: Dict[str, List["np.ndarray"]] = {attr: [] for attr, _dtype in self.COLUMNS}
+        self._columns: Optional[Dict[str, "np.ndarray"]] = None
+        if features:
+            self.add(features)
+
+    def add(self, features: Sequence[tekore.model.AudioFeatures]) -> None:
+        """Add one batch of features, tracks without any are skipped"""
+        features = [f for f in features if f is not None]
+        if not features:
+            return
+        for attr, dtype in self.COLUMNS:
+            self._batches[attr].append(
+                np.fromiter((getattr(f, attr) for f in features), dtype, len(features))
+            )
+        self.count += len(features)
+        self._columns = None
+
+    def column(self, attr: str) -> "np.ndarray":
+        if self._columns is None:
+            self._columns = {
+                name: np.concatenate(self._batches[name]) if self.count else np.empty(0, dtype)
+                for name, dtype in self.COLUMNS
+            }
+            # the joined arrays replace the per batch ones
+            self._batches = {name: [self._columns[name]] for name, _dtype in self.COLUMNS}
+        return self._columns[attr]
+
+    def summary(self) -> List[Tuple[str, str, str, str, str]]:
+        rows = []
+        for attr, (low, high), bins in SUMMARY_FEATURES:
+            values = self.column(attr)
+            # tempo is shown as-is, everything else is a 0-1 ratio shown as a percentage
+            scale, fmt = (1, "{:.0f}") if attr == "tempo" else (100, "{:.0f}%")
+            counts, _edges = np.histogram(np.clip(values, low, high), bins=bins, range=(low, high))
+            rows.append(
+                (
+                    attr.title(),
+                    fmt.format(values.mean() * scale),
+                    fmt.format(values.std() * scale),
+                    fmt.format(np.median(values) * scale),
+                    sparkline(counts),
+                )
+            )
+        return rows
+
+    def keys(self, limit: int = 5) -> List[Tuple[str, str]]:
+        """The most common keys and modes as a percentage of the tracks"""
+        # keys of -1 mean spotify couldn't detect one
+        key, mode = self.column("key"), self.column("mode")
+        detected = key >= 0
+        counts = np.bincount(key[detected] * 2 + mode[detected].clip(0, 1), minlength=24)
+        order = np.argsort(counts, kind="stable")[::-1][:limit]
+        return [
+            (f"{PITCH[i // 2].strip()} {MODE[i % 2]}", f"{counts[i] / self.count:.0%}")
+            for i in order
+            if counts[i]
+        ]
+
+    def mode_split(self) -> Tuple[float, float]:
+        major = float(np.count_nonzero(self.column("mode") == 1)) / self.count
+        return major, 1.0 - major
+
+    def render(self) -> str:
+        if not self.count:
+            return ""
+        table = tabulate(
+            self.summary(),
+            headers=["Feature", "Mean", "Std", "Median", "Histogram"],
+            tablefmt="pretty",
+        )
+        major, minor = self.mode_split()
+        keys = tabulate(self.keys(), headers=["Key", "Tracks"], tablefmt="pretty")
+        seconds = int(self.column("duration_ms").sum() / 1000)
+        length = humanize_timedelta(seconds=seconds) or "0 seconds"
+        return (
+            f"{table}\n{keys}\n"
+            f"Major {major:.0%} / minor {minor:.0%}, {self.count} tracks, {length}"
+        )
@@ -0,0 +1,604 @@
+"""
+MIT License
+
+Copyright (c) 2017 TrustyJAID
+
+Permission is hereby granted, free of charge, to any person obtaining a copy
+of this software and associated documentation files (the "Software"), to deal
+in the Software without restriction, including without limitation the rights
+to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+copies of the Software, and to permit persons to whom the Software is
+furnished to do so, subject to the following conditions:
+
+The above copyright notice and this permission notice shall be included in all
+copies or substantial portions of the Software.
+
+THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE
+SOFTWARE.
+
+Offline benchmarks for the Spotify cog
+
+Runs the cogs commands against a fake Spotify Web API served through
+an httpx transport and reports how many API calls, how much time and
+how much memory each one costs. Nothing here talks to Discord or Spotify.
+
+    python -m spotify.benchmark --playlists 2000 --saved-tracks 10000 --latency 0.05
+
+`--json` prints the raw numbers so runs can be compared.
+"""
+
+import argparse
+import asyncio
+import functools
+import itertools
+import json
+import random
+import statistics
+import tempfile
+import time
+import tracemalloc
+from collections import Counter
+from typing import Any, Awaitable, Callable, Dict, List, Optional, Tuple
+from unittest import mock
+from urllib.parse import parse_qs
+
+import discord
+import httpx
+import tekore
+from redbot.core import data_manager
+from tabulate import tabulate
+
+from . import spotify as cog_module
+from .helpers import SPOTIFY_RE
+from .sender import SpotifySender, endpoint_name
+
+API = "https://api.spotify.com/v1/"
+
+
+def _id(kind: str, number: int) -> str:
+    return f"{kind}{number:021d}"
+
+
+class FakeSpotifyAPI:
+    """
+    A tiny deterministic stand in for the Spotify Web API
+
+    Only the endpoints the benchmarks touch are implemented and every
+    response waits `latency` seconds (+- `jitter`) before returning.
+    Requests are counted per endpoint in `calls`.
+    """
+
+    def __init__(
+        self,
+        *,
+        playlists: int = 2000,
+        saved_tracks: int = 10000,
+        playlist_tracks: int = 100,
+        latency: float = 0.05,
+        jitter: float = 0.0,
+        seed: int = 0,
+    ):
+        self.playlists = playlists
+        self.saved_tracks = saved_tracks
+        self.playlist_tracks = playlist_tracks
+        self.latency = latency
+        self.jitter = jitter
+        self.random = random.Random(seed)
+        self.calls: Counter = Counter()
+        self.transport = httpx.MockTransport(self.handle)
+
+    def sender(self) -> tekore.AsyncSender:
+        return tekore.AsyncSender(client=httpx.AsyncClient(transport=self.transport))
+
+    # payloads
+
+    def user(self) -> dict:
+        return {
+            "id": "benchmark",
+            "display_name": "Benchmark",
+            "href": API + "users/benchmark",
+            "type": "user",
+            "uri": "spotify:user:benchmark",
+            "external_urls": {},
+            "images": [],
+            "country": "US",
+            "product": "premium",
+        }
+
+    def artist(self, n: int) -> dict:
+        artist_id = _id("a", n)
+        return {
+            "id": artist_id,
+            "name": f"Artist {n}",
+            "href": API + f"artists/{artist_id}",
+            "type": "artist",
+            "uri": f"spotify:artist:{artist_id}",
+            "external_urls": {"spotify": f"https://open.spotify.com/artist/{artist_id}"},
+        }
+
+    def album(self, n: int) -> dict:
+        album_id = _id("b", n)
+        return {
+            "id": album_id,
+            "name": f"Album {n}",
+            "album_type": "album",
+            "artists": [self.artist(n % 500)],
+            "href": API + f"albums/{album_id}",
+            "type": "album",
+            "uri": f"spotify:album:{album_id}",
+            "external_urls": {"spotify": f"https://open.spotify.com/album/{album_id}"},
+            "images": [{"url": "https://i.scdn.co/image/benchmark", "height": 640, "width": 640}],
+            "release_date": "2021-01-01",
+            "release_date_precision": "day",
+            "total_tracks": 12,
+        }
+
+    def full_album(self, n: int) -> dict:
+        tracks = [self.track(n * 12 + i) for i in range(12)]
+        for track in tracks:
+            del track["album"], track["external_ids"], track["popularity"]
+        album_url = API + f"albums/{_id('b', n)}/tracks"
+        return {
+            **self.album(n),
+            "tracks": self.paging(album_url, tracks, len(tracks), 50, 0),
+            "copyrights": [],
+            "external_ids": {},
+            "genres": [],
+            "label": "Benchmark",
+            "popularity": n % 100,
+        }
+
+    def track(self, n: int) -> dict:
+        track_id = _id("t", n)
+        return {
+            "id": track_id,
+            "name": f"Song {n}",
+            "album": self.album(n // 12),
+            "artists": [self.artist(n % 500)],
+            "disc_number": 1,
+            "duration_ms": 180000 + n % 60000,
+            "explicit": False,
+            "external_ids": {},
+            "external_urls": {"spotify": f"https://open.spotify.com/track/{track_id}"},
+            "href": API + f"tracks/{track_id}",
+            "is_local": False,
+            "popularity": n % 100,
+            "preview_url": None,
+            "track_number": n % 12 + 1,
+            "type": "track",
+            "uri": f"spotify:track:{track_id}",
+        }
+
+    def playlist(self, n: int) -> dict:
+        playlist_id = _id("p", n)
+        return {
+            "id": playlist_id,
+            "name": f"Playlist {n}",
+            "collaborative": False,
+            "description": "",
+            "external_urls": {"spotify": f"https://open.spotify.com/playlist/{playlist_id}"},
+            "href": API + f"playlists/{playlist_id}",
+            "images": [],
+            "owner": {
+                "id": "benchmark",
+                "href": API + "users/benchmark",
+                "type": "user",
+                "uri": "spotify:user:benchmark",
+                "external_urls": {},
+            },
+            "public": n % 3 != 0,
+            "snapshot_id": "snapshot",
+            "primary_color": None,
+            "tracks": {
+                "href": API + f"playlists/{playlist_id}/tracks",
+                "total": self.playlist_tracks,
+            },
+            "type": "playlist",
+            "uri": f"spotify:playlist:{playlist_id}",
+        }
+
+    def audio_features(self, track_id: str) -> dict:
+        n = int(track_id[1:])
+        return {
+            "id": track_id,
+            "acousticness": 0.5,
+            "analysis_url": API + f"audio-analysis/{track_id}",
+            "danceability": n % 100 / 100,
+            "duration_ms": 180000,
+            "energy": n * 37 % 100 / 100,
+            "instrumentalness": 0.0,
+            "key": n % 12,
+            "liveness": 0.1,
+            "loudness": -6.0,
+            "mode": n % 3 % 2,
+            "speechiness": 0.05,
+            "tempo": 60.0 + n * 7 % 140,
+            "time_signature": 4,
+            "track_href": API + f"tracks/{track_id}",
+            "type": "audio_features",
+            "uri": f"spotify:track:{track_id}",
+            "valence": n * 53 % 100 / 100,
+        }
+
+    def playback(self) -> dict:
+        return {
+            "actions": {"disallows": {}},
+            "currently_playing_type": "track",
+            "device": {
+                "id": "device",
+                "is_active": True,
+                "is_private_session": False,
+                "is_restricted": False,
+                "name": "Benchmark",
+                "type": "Computer",
+                "volume_percent": 50,
+            },
+            "is_playing": True,
+            "item": self.track(1),
+            "progress_ms": 1000,
+            "repeat_state": "off",
+            "shuffle_state": False,
+            "timestamp": int(time.time() * 1000),
+            "context": None,
+        }
+
+    @staticmethod
+    def paging(
+        url: str, items: List[dict], total: int, limit: int, offset: int
+    ) -> Dict[str, Any]:
+        return {
+            "href": url,
+            "items": items,
+            "limit": limit,
+            "offset": offset,
+            "total": total,
+            "next": None if offset + limit >= total else url,
+            "previous": None,
+        }
+
+    def saved_track(self, n: int) -> dict:
+        # saved tracks come back newest first
+        added = 1600000000 + (self.saved_tracks - n) * 60
+        return {
+            "added_at": time.strftime("%Y-%m-%dT%H:%M:%SZ", time.gmtime(added)),
+            "track": self.track(n),
+        }
+
+    def playlist_track(self, n: int) -> dict:
+        return {
+            "added_at": "2021-01-01T00:00:00Z",
+            "added_by": self.playlist(0)["owner"],
+            "is_local": False,
+            "primary_color": None,
+            "video_thumbnail": {"url": None},
+            "track": {**self.track(n), "episode": False, "track": True},
+        }
+
+    # routing
+
+    def route(self, request: httpx.Request) -> Tuple[int, Optional[dict]]:
+        if request.url.host == "accounts.spotify.com":
+            token = {"access_token": "app", "token_type": "Bearer", "expires_in": 3600}
+            return 200, token
+        path = endpoint_name(str(request.url))
+        params = {k: v[0] for k, v in parse_qs(request.url.query.decode()).items()}
+        limit = int(params.get("limit", 20))
+        offset = int(params.get("offset", 0))
+        url = str(request.url)
+        if request.method == "PUT" and path.startswith("me/player"):
+            return 204, None
+        if path == "me":
+            return 200, self.user()
+        if path == "me/player":
+            return 200, self.playback()
+        if path == "me/playlists":
+            items = [self.playlist(n) for n in range(offset, min(offset + limit, self.playlists))]
+            return 200, self.paging(url, items, self.playlists, limit, offset)
+        if path in ("me/tracks/contains", "me/albums/contains", "me/following/contains"):
+            return 200, [False for _id in params.get("ids", "").split(",")]
+        if path == "me/tracks":
+            end = min(offset + limit, self.saved_tracks)
+            items = [self.saved_track(n) for n in range(offset, end)]
+            return 200, self.paging(url, items, self.saved_tracks, limit, offset)
+        if path == "search":
+            total = 1000
+            search_type = params.get("type", "track")
+            make = {"playlist": self.playlist, "album": self.album}.get(search_type, self.track)
+            items = [make(n) for n in range(offset, min(offset + limit, total))]
+            return 200, {f"{search_type}s": self.paging(url, items, total, limit, offset)}
+        if path == "playlists/{id}/tracks" and request.method in ("POST", "DELETE"):
+            return 201, {"snapshot_id": "snapshot"}
+        if path == "playlists/{id}/tracks":
+            end = min(offset + limit, self.playlist_tracks)
+            items = [self.playlist_track(n) for n in range(offset, end)]
+            return 200, self.paging(url, items, self.playlist_tracks, limit, offset)
+        if path == "audio-features":
+            ids = params.get("ids", "").split(",")
+            return 200, {"audio_features": [self.audio_features(i) for i in ids]}
+        if path == "tracks":
+            ids = params.get("ids", "").split(",")
+            return 200, {"tracks": [self.track(int(i[1:])) for i in ids]}
+        if path == "albums":
+            ids = params.get("ids", "").split(",")
+            return 200, {"albums": [self.full_album(int(i[1:])) for i in ids]}
+        if path == "recommendations/available-genre-seeds":
+            return 200, {"genres": ["acoustic", "hip-hop", "rock"]}
+        return 404, {"error": {"status": 404, "message": f"{path} is not faked"}}
+
+    async def handle(self, request: httpx.Request) -> httpx.Response:
+        self.calls[endpoint_name(str(request.url))] += 1
+        delay = self.latency + self.random.uniform(-self.jitter, self.jitter)
+        await asyncio.sleep(max(0.0, delay))
+        status, payload = self.route(request)
+        if payload is None:
+            return httpx.Response(status)
+        return httpx.Response(status, json=payload)
+
+
+class StubUser:
+    bot = False
+
+    def __init__(self, user_id: int, name: str):
+        self.id = user_id
+        self.name = self.display_name = name
+        self.mention = f"<@{user_id}>"
+        self.avatar_url = "https://cdn.discordapp.com/embed/avatars/0.png"
+
+
+class StubMessage:
+    _ids = itertools.count(1)
+    attachments: List[Any] = []
+
+    def __init__(self, channel: "StubChannel", **kwargs):
+        self.id = next(self._ids)
+        self.channel = channel
+        self.guild = None
+        self.jump_url = f"https://discord.com/channels/@me/{channel.id}/{self.id}"
+        self.kwargs = kwargs
+
+    async def edit(self, **kwargs):
+        self.kwargs.update(kwargs)
+
+    async def add_reaction(self, emoji):
+        pass
+
+    async def clear_reactions(self):
+        pass
+
+    async def delete(self, **kwargs):
+        pass
+
+
+class StubChannel:
+    id = 1
+    guild = None
+
+    def __init__(self):
+        self.sent: List[StubMessage] = []
+
+    def permissions_for(self, member) -> discord.Permissions:
+        return discord.Permissions.all()
+
+    async def send(self, content=None, **kwargs) -> StubMessage:
+        message = StubMessage(self, content=content, **kwargs)
+        self.sent.append(message)
+        return message
+
+
+class _Typing:
+    async def __aenter__(self):
+        return self
+
+    async def __aexit__(self, *exc):
+        return False
+
+
+class StubContext:
+    """Just enough of `commands.Context` for the commands being benchmarked"""
+
+    prefix = clean_prefix = "!"
+    guild = None
+
+    def __init__(self, bot: "StubBot", author: StubUser):
+        self.bot = bot
+        self.author = author
+        self.me = bot.user
+        self.channel = StubChannel()
+        self.message = StubMessage(self.channel)
+
+    def typing(self) -> _Typing:
+        return _Typing()
+
+    async def send(self, content=None, **kwargs):
+        return await self.channel.send(content, **kwargs)
+
+    async def maybe_send_embed(self, content):
+        return await self.channel.send(content)
+
+    async def react_quietly(self, emoji):
+        return True
+
+    async def tick(self):
+        return True
+
+    async def embed_colour(self):
+        return discord.Colour.green()
+
+    embed_color = embed_colour
+
+
+class StubBot:
+    """Just enough of `Red` for the cog to start and open menus"""
+
+    owner_ids = {0}
+
+    def __init__(self):
+        self.loop = asyncio.get_running_loop()
+        self.user = StubUser(2, "Benchmark")
+
+    async def get_shared_api_tokens(self, service_name: str) -> Dict[str, str]:
+        return {"client_id": "client", "client_secret": "secret"}
+
+    async def wait_for(self, event, *, check=None, timeout=None):
+        raise asyncio.TimeoutError()
+
+    async def get_embed_colour(self, location):
+        return discord.Colour.green()
+
+    async def cog_disabled_in_guild(self, cog, guild) -> bool:
+        return False
+
+    def dispatch(self, event, *args, **kwargs):
+        pass
+
+    def get_cog(self, name):
+        return None
+
+    def is_closed(self) -> bool:
+        return False
+
+    def register_rpc_handler(self, method):
+        pass
+
+    def unregister_rpc_handler(self, method):
+        pass
+
+
+Scenario = Callable[[Any, StubContext], Awaitable[Any]]
+
+SCENARIOS: Dict[str, Scenario] = {
+    "now": lambda cog, ctx: cog.spotify_now.callback(cog, ctx),
+    "now detailed": lambda cog, ctx: cog.spotify_now.callback(cog, ctx, True),
+    "search detailed": lambda cog, ctx: cog.spotify_search.callback(
+        cog, ctx, True, "track", query="song 1"
+    ),
+    "search playlist": lambda cog, ctx: cog.spotify_search.callback(
+        cog, ctx, False, "playlist", query="playlist 1"
+    ),
+    "search album": lambda cog, ctx: cog.spotify_search.callback(
+        cog, ctx, False, "album", query="album 1"
+    ),
+    "playlist export": lambda cog, ctx: cog.spotify_playlist_export.callback(
+        cog, ctx, "Playlist 1"
+    ),
+    "playlist add playlist": lambda cog, ctx: cog.spotify_playlist_add.callback(
+        cog, ctx, "Playlist 1", SPOTIFY_RE.match(f"spotify:playlist:{_id('p', 2)}")
+    ),
+    "playlist stats": lambda cog, ctx: cog.spotify_playlist_stats.callback(
+        cog, ctx, "Playlist 1"
+    ),
+    "playlist list": lambda cog, ctx: cog.playlist_playlist_list.callback(cog, ctx),
+    "play playlist name": lambda cog, ctx: cog.spotify_play.callback(
+        cog, ctx, url_or_playlist_name="playlist 1999"
+    ),
+    "library sync": lambda cog, ctx: cog.spotify_library_sync.callback(cog, ctx),
+}
+
+
+async def start_cog(api: FakeSpotifyAPI, rate: Optional[float]) -> Tuple[Any, StubContext]:
+    bot = StubBot()
+    kwargs = {"rate": rate} if rate else {}
+    sender = functools.partial(SpotifySender, api.sender(), **kwargs)
+    with mock.patch.object(cog_module, "SpotifySender", sender):
+        cog = cog_module.Spotify(bot)
+        await cog._ready.wait()
+    author = StubUser(1, "benchmark")
+    token = {
+        "access_token": "user",
+        "refresh_token": "refresh",
+        "token_type": "Bearer",
+        "expires_in": 3600,
+        "scope": " ".join(await cog.config.scopes()),
+    }
+    cog._user_tokens[author.id] = tekore.Token(token, False)
+    return cog, StubContext(bot, author)
+
+
+def percentile(samples: List[float], pct: float) -> float:
+    ordered = sorted(samples)
+    index = min(len(ordered) - 1, max(0, round(pct / 100 * len(ordered) + 0.5) - 1))
+    return ordered[index]
+
+
+async def run_scenario(
+    name: str, scenario: Scenario, api: FakeSpotifyAPI, iterations: int, rate: Optional[float]
+) -> Dict[str, Any]:
+    cog, ctx = await start_cog(api, rate)
+    timings: List[float] = []
+    calls: List[Counter] = []
+    tracemalloc.start()
+    try:
+        for _i in range(iterations):
+            api.calls.clear()
+            start = time.perf_counter()
+            await scenario(cog, ctx)
+            timings.append(time.perf_counter() - start)
+            calls.append(api.calls.copy())
+            # close menus and let background tasks settle before the next run
+            cog._menu_router.stop()
+            await asyncio.sleep(0)
+        _current, peak = tracemalloc.get_traced_memory()
+    finally:
+        tracemalloc.stop()
+        cog.cog_unload()
+        await asyncio.sleep(0)
+    warm = calls[1:] or calls
+    return {
+        "scenario": name,
+        "cold_calls": sum(calls[0].values()),
+        "warm_calls": statistics.mean(sum(c.values()) for c in warm),
+        "p50_ms": percentile(timings, 50) * 1000,
+        "p99_ms": percentile(timings, 99) * 1000,
+        "peak_kib": peak / 1024,
+        "endpoints": dict(sum(calls, Counter()).most_common(3)),
+    }
+
+
+async def main(args: argparse.Namespace) -> List[Dict[str, Any]]:
+    data_manager.basic_config = {
+        **data_manager.basic_config_default,
+        "DATA_PATH": tempfile.mkdtemp(prefix="spotify-benchmark-"),
+        "STORAGE_TYPE": "JSON",
+        "STORAGE_DETAILS": {},
+    }
+    results = []
+    for name, scenario in SCENARIOS.items():
+        if args.only and name not in args.only:
+            continue
+        api = FakeSpotifyAPI(
+            playlists=args.playlists,
+            saved_tracks=args.saved_tracks,
+            playlist_tracks=args.playlist_tracks,
+            latency=args.latency,
+            jitter=args.jitter,
+        )
+        results.append(await run_scenario(name, scenario, api, args.iterations, args.rate))
+    return results
+
+
+def parse_args(argv: Optional[List[str]] = None) -> argparse.Namespace:
+    parser = argparse.ArgumentParser(description="Offline benchmarks for the Spotify cog")
+    parser.add_argument("--playlists", type=int, default=2000)
+    parser.add_argument("--saved-tracks", type=int, default=10000)
+    parser.add_argument("--playlist-tracks", type=int, default=10000)
+    parser.add_argument("--latency", type=float, default=0.05, help="seconds per API call")
+    parser.add_argument("--jitter", type=float, default=0.0)
+    parser.add_argument("--iterations", type=int, default=10)
+    parser.add_argument("--rate", type=float, default=None, help="override the sender rate")
+    parser.add_argument("--only", nargs="*", choices=list(SCENARIOS), default=None)
+    parser.add_argument("--json", action="store_true", help="print raw results as JSON")
+    return parser.parse_args(argv)
+
+
+if __name__ == "__main__":
+    arguments = parse_args()
+    output = asyncio.run(main(arguments))
+    if arguments.json:
+        print(json.dumps(output, indent=2))
+    else:
+        print(tabulate(output, headers="keys", floatfmt=".1f"))
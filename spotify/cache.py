@@ -0,0 +1,238 @@
+"""
+MIT License
+
+Copyright (c) 2017 TrustyJAID
+
+Permission is hereby granted, free of charge, to any person obtaining a copy
+of this software and associated documentation files (the "Software"), to deal
+in the Software without restriction, including without limitation the rights
+to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+copies of the Software, and to permit persons to whom the Software is
+furnished to do so, subject to the following conditions:
+
+The above copyright notice and this permission notice shall be included in all
+copies or substantial portions of the Software.
+
+THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE
+SOFTWARE.
+"""
+
+import asyncio
+import time
+from collections import OrderedDict
+from typing import (
+    Any,
+    Awaitable,
+    Callable,
+    Dict,
+    Hashable,
+    Iterable,
+    Iterator,
+    List,
+    Optional,
+    Tuple,
+)
+
+import tekore
+
+
+class TTLCache:
+    """
+    A small LRU cache where every entry also expires after `ttl` seconds
+
+    `ttl` of `None` keeps entries until they're evicted by `max_size`
+    and `max_size` of `None` lets the cache grow without limit.
+    `max_size` counts entries unless `sizeof` is given, then it's the
+    total of `sizeof(value)` over every entry, for values that vary
+    too much in size for a count to bound their memory.
+    """
+
+    def __init__(
+        self,
+        ttl: Optional[float] = None,
+        max_size: Optional[int] = None,
+        sizeof: Optional[Callable[[Any], int]] = None,
+    ):
+        self.ttl = ttl
+        self.max_size = max_size
+        self.sizeof = sizeof
+        self.size = 0
+        self._data: "OrderedDict[Hashable, Tuple[float, Any, int]]" = OrderedDict()
+        self._pending: Dict[Hashable, asyncio.Future] = {}
+
+    def __len__(self) -> int:
+        return len(self._data)
+
+    def __contains__(self, key: Hashable) -> bool:
+        return self.get(key, _MISSING) is not _MISSING
+
+    def __iter__(self) -> Iterator[Hashable]:
+        return iter(list(self._data.keys()))
+
+    def get(self, key: Hashable, default: Any = None) -> Any:
+        try:
+            expires, value, _size = self._data[key]
+        except KeyError:
+            return default
+        if expires and expires < time.monotonic():
+            self._remove(key)
+            return default
+        self._data.move_to_end(key)
+        return value
+
+    def set(self, key: Hashable, value: Any, ttl: Optional[float] = None) -> None:
+        ttl = ttl if ttl is not None else self.ttl
+        expires = time.monotonic() + ttl if ttl else 0
+        size = self.sizeof(value) if self.sizeof else 1
+        self._remove(key)
+        self._data[key] = (expires, value, size)
+        self.size += size
+        if self.max_size is not None:
+            # always keep the newest entry even if it's bigger than the limit alone
+            while self.size > self.max_size and len(self._data) > 1:
+                self._remove(next(iter(self._data)))
+
+    def _remove(self, key: Hashable) -> Any:
+        expires, value, size = self._data.pop(key, (0, None, 0))
+        self.size -= size
+        return value
+
+    async def get_or_fetch(self, key: Hashable, fetch: Callable[[], Awaitable[Any]]) -> Any:
+        """
+        Get `key` from the cache or store the result of `fetch()` under it
+
+        Callers asking for the same missing key at the same time
+        all wait on a single call to `fetch`.
+        """
+        value = self.get(key, _MISSING)
+        if value is not _MISSING:
+            return value
+        task = self._pending.get(key)
+        if task is None:
+            task = asyncio.ensure_future(fetch())
+            self._pending[key] = task
+
+            def done(t: asyncio.Future) -> None:
+                self._pending.pop(key, None)
+                if not t.cancelled() and t.exception() is None:
+                    self.set(key, t.result())
+
+            task.add_done_callback(done)
+        return await asyncio.shield(task)
+
+    def pop(self, key: Hashable, default: Any = None) -> Any:
+        if key not in self._data:
+            return default
+        return self._remove(key)
+
+    def clear(self) -> None:
+        self._data.clear()
+        self.size = 0
+
+    def expire(self) -> None:
+        """Drop every entry that has already expired"""
+        now = time.monotonic()
+        for key in [k for k, (expires, _v, _s) in self._data.items() if expires and expires < now]:
+            self._remove(key)
+
+
+_MISSING = object()
+
+
+class AudioFeaturesCache:
+    """
+    Caches track audio features and fetches missing ones in batches
+
+    Lookups for a single track can pass the other tracks likely to be
+    needed soon (the rest of a search result for example) so they're
+    all requested through the multi-id endpoint at once.
+    """
+
+    MAX_IDS = 100
+
+    def __init__(self, ttl: Optional[float] = 86400, max_size: Optional[int] = 10000):
+        self._cache = TTLCache(ttl=ttl, max_size=max_size)
+        self._pending: Dict[str, asyncio.Future] = {}
+
+    async def prefetch(self, user_spotify: tekore.Spotify, track_ids: Iterable[str]) -> None:
+        """
+        Fetch audio features for any of `track_ids` that aren't cached yet
+
+        This must be called inside `user_spotify.token_as()`.
+        """
+        missing = []
+        for track_id in dict.fromkeys(track_ids):
+            if not track_id or track_id in self._cache or track_id in self._pending:
+                continue
+            missing.append(track_id)
+        if not missing:
+            return
+        loop = asyncio.get_running_loop()
+        futures = {track_id: loop.create_future() for track_id in missing}
+        self._pending.update(futures)
+        try:
+            for i in range(0, len(missing), self.MAX_IDS):
+                chunk = missing[i : i + self.MAX_IDS]
+                features = await user_spotify.tracks_audio_features(chunk)
+                for track_id, feature in zip(chunk, features):
+                    self._cache.set(track_id, feature)
+                    futures[track_id].set_result(feature)
+        except Exception as e:
+            for future in futures.values():
+                if not future.done():
+                    future.set_exception(e)
+                    # mark it as retrieved so it isn't logged when nobody is waiting
+                    future.exception()
+            raise
+        finally:
+            for track_id in missing:
+                self._pending.pop(track_id, None)
+
+    async def get(
+        self,
+        user_spotify: tekore.Spotify,
+        track_id: str,
+        batch: Iterable[str] = (),
+    ) -> Optional[tekore.model.AudioFeatures]:
+        """
+        Get the audio features for `track_id`
+
+        If it isn't cached it's fetched along with up to 99 uncached ids from `batch`.
+        Returns `None` when Spotify has no features for the track.
+        This must be called inside `user_spotify.token_as()`.
+        """
+        if track_id in self._cache:
+            return self._cache.get(track_id)
+        if track_id not in self._pending:
+            extra = [i for i in batch if i and i != track_id and i not in self._cache]
+            await self.prefetch(user_spotify, [track_id, *extra[: self.MAX_IDS - 1]])
+        future = self._pending.get(track_id)
+        if future is None:
+            return self._cache.get(track_id)
+        return await asyncio.shield(future)
+
+    async def get_many(
+        self, user_spotify: tekore.Spotify, track_ids: Iterable[str]
+    ) -> List[Optional[tekore.model.AudioFeatures]]:
+        """
+        Get the audio features for each of `track_ids` in order
+
+        Only the uncached ones are fetched, 100 per request.
+        This must be called inside `user_spotify.token_as()`.
+        """
+        track_ids = list(track_ids)
+        await self.prefetch(user_spotify, track_ids)
+        features = []
+        for track_id in track_ids:
+            future = self._pending.get(track_id)
+            if future is None:
+                features.append(self._cache.get(track_id))
+            else:
+                # being fetched by someone else
+                features.append(await asyncio.shield(future))
+        return features
@@ -0,0 +1,137 @@
+"""
+MIT License
+
+Copyright (c) 2017 TrustyJAID
+
+Permission is hereby granted, free of charge, to any person obtaining a copy
+of this software and associated documentation files (the "Software"), to deal
+in the Software without restriction, including without limitation the rights
+to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+copies of the Software, and to permit persons to whom the Software is
+furnished to do so, subject to the following conditions:
+
+The above copyright notice and this permission notice shall be included in all
+copies or substantial portions of the Software.
+
+THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE
+SOFTWARE.
+"""
+
+import logging
+from typing import Any, Dict, List, NamedTuple, Optional
+
+import discord
+from redbot.core import commands
+
+log = logging.getLogger("red.trusty-cogs.spotify")
+
+# the most buttons discord allows in one action row
+ROW_SIZE = 5
+
+
+class Route(discord.http.Route):
+    BASE = "https://discord.com/api/v8"
+
+
+class Button:
+    """A message button that sends an interaction with `custom_id` when pressed"""
+
+    __slots__ = ("custom_id", "emoji", "style", "type")
+
+    def __init__(self, custom_id: str, emoji: discord.PartialEmoji, style: int = 2):
+        self.custom_id = custom_id
+        self.emoji = emoji
+        self.style = style
+        self.type = 2
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {
+            "type": self.type,
+            "style": self.style,
+            "custom_id": self.custom_id,
+            "emoji": self.emoji.to_dict(),
+        }
+
+
+class Component:
+    """An action row of up to 5 buttons"""
+
+    def __init__(self, buttons: List[Button]):
+        self.buttons = buttons
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {"type": 1, "components": [b.to_dict() for b in self.buttons]}
+
+    @classmethod
+    def rows(cls, buttons: List[Button]) -> List["Component"]:
+        return [cls(buttons[i : i + ROW_SIZE]) for i in range(0, len(buttons), ROW_SIZE)]
+
+
+class ButtonPress(NamedTuple):
+    """
+    A button interaction in the shape of a `discord.RawReactionActionEvent`
+
+    This lets menu buttons be triggered by either reactions or components.
+    """
+
+    message_id: int
+    channel_id: int
+    guild_id: Optional[int]
+    user_id: int
+    emoji: Optional[discord.PartialEmoji]
+    event_type: str = "INTERACTION_CREATE"
+
+
+async def send_button(
+    ctx: commands.Context, components: List[Component], content: str = None, **kwargs
+) -> discord.Message:
+    """Send a message with components in a single request"""
+    payload: Dict[str, Any] = {}
+    state = ctx._state
+    if content:
+        payload["content"] = str(content)
+    if embed := kwargs.get("embed"):
+        payload["embeds"] = [embed.to_dict()]
+    payload["components"] = [c.to_dict() for c in components]
+    if state.allowed_mentions is not None:
+        payload["allowed_mentions"] = state.allowed_mentions.to_dict()
+    channel = kwargs.get("channel", ctx.channel)
+    r = Route("POST", "/channels/{channel_id}/messages", channel_id=channel.id)
+    data = await ctx.bot.http.request(r, json=payload)
+    return discord.Message(state=state, channel=channel, data=data)
+
+
+async def edit_components(
+    bot: commands.Bot, message: discord.Message, components: List[Component]
+) -> None:
+    """Replace the components on a message leaving everything else alone"""
+    r = Route(
+        "PATCH",
+        "/channels/{channel_id}/messages/{message_id}",
+        channel_id=message.channel.id,
+        message_id=message.id,
+    )
+    await bot.http.request(r, json={"components": [c.to_dict() for c in components]})
+
+
+async def defer_interaction(bot: commands.Bot, data: Dict[str, Any]) -> None:
+    """
+    Acknowledge a component interaction without changing the message yet
+
+    Discord shows the interaction as failed unless this happens within 3 seconds.
+    """
+    r = Route(
+        "POST",
+        "/interactions/{interaction_id}/{interaction_token}/callback",
+        interaction_id=data["id"],
+        interaction_token=data["token"],
+    )
+    try:
+        await bot.http.request(r, json={"type": 6})
+    except discord.HTTPException:
+        log.debug("Error acknowledging interaction %s", data["id"], exc_info=True)
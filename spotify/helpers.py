@@ -22,11 +22,27 @@ OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE
 SOFTWARE.
 """
 
+import asyncio
 import datetime
+import itertools
 import logging
 import re
-from typing import Final, List, Pattern, Union
+from collections import deque
+from typing import (
+    AsyncIterator,
+    Awaitable,
+    Final,
+    Iterable,
+    Iterator,
+    List,
+    NamedTuple,
+    Optional,
+    Pattern,
+    TypeVar,
+    Union,
+)
 
+import discord
 import tekore
 from discord.ext.commands.converter import Converter
 from discord.ext.commands.errors import BadArgument
@@ -47,6 +63,8 @@ _RE_TIME_CONVERTER: Final[Pattern] = re.compile(r"(?:(\d+):)?([0-5]?[0-9]):([0-5
 
 _ = Translator("Spotify", __file__)
 
+T = TypeVar("T")
+
 
 REPEAT_STATES = {
     "context": "\N{CLOCKWISE RIGHTWARDS AND LEFTWARDS OPEN CIRCLE ARROWS}",
@@ -96,6 +114,44 @@ VALID_RECOMMENDATIONS = {
 }
 
 
+_RE_RECOMMENDATION: Final[Pattern] = re.compile(
+    r"({})\W(.+)".format("|".join(VALID_RECOMMENDATIONS.keys())), flags=re.I
+)
+
+_RE_GENRE_CHUNK: Final[Pattern] = re.compile(r"\w+(?:-\w+)*")
+
+
+class GenreMatcher:
+    """
+    Finds genre seeds inside some text
+
+    Genres are stored in a set so matching only depends on the length
+    of the text, not on how many genres Spotify has.
+    Hyphenated genres like `drum-and-bass` are matched against runs of hyphenated
+    words, preferring the longest genre starting at each word.
+    """
+
+    def __init__(self, genres: List[str]):
+        self.genres = frozenset(g.lower() for g in genres)
+        self.max_parts = max((g.count("-") + 1 for g in self.genres), default=0)
+
+    def findall(self, text: str) -> List[str]:
+        found = []
+        for chunk in _RE_GENRE_CHUNK.findall(text.lower()):
+            parts = chunk.split("-")
+            i = 0
+            while i < len(parts):
+                for j in range(min(len(parts), i + self.max_parts), i, -1):
+                    genre = "-".join(parts[i:j])
+                    if genre in self.genres:
+                        found.append(genre)
+                        i = j
+                        break
+                else:
+                    i += 1
+        return found
+
+
 class SpotifyError(Exception):
     pass
 
@@ -126,6 +182,133 @@ def time_convert(length: Union[int, str]) -> int:
             return 0
 
 
+async def bounded_gather(aws: Iterable[Awaitable[T]], limit: int = 8) -> List[T]:
+    """
+    Like `asyncio.gather` but only allows `limit` awaitables to run at once
+
+    Results are returned in the same order the awaitables were given.
+    """
+    semaphore = asyncio.Semaphore(limit)
+
+    async def run(aw: Awaitable[T]) -> T:
+        async with semaphore:
+            return await aw
+
+    return await asyncio.gather(*(run(aw) for aw in aws))
+
+
+async def iter_playlist_items(
+    user_spotify: tekore.Spotify, playlist_id: str, limit: int = 8, page_size: int = 100
+) -> AsyncIterator[tekore.model.PlaylistTrack]:
+    """
+    Yield every item in a playlist in order
+
+    The first page gives the total, after that up to `limit` pages are
+    fetched ahead concurrently. Only those pages are held in memory
+    so this works the same for a playlist of any size.
+    This must be iterated inside `user_spotify.token_as()`.
+    """
+    first = await user_spotify.playlist_items(playlist_id, limit=page_size)
+    offsets = iter(range(page_size, first.total, page_size))
+    pending: deque = deque()
+
+    def fetch_next(count: int) -> None:
+        for offset in itertools.islice(offsets, count):
+            pending.append(
+                asyncio.ensure_future(
+                    user_spotify.playlist_items(playlist_id, limit=page_size, offset=offset)
+                )
+            )
+
+    try:
+        fetch_next(limit)
+        for item in first.items:
+            yield item
+        while pending:
+            page = await pending.popleft()
+            fetch_next(1)
+            for item in page.items:
+                yield item
+    finally:
+        for task in pending:
+            task.cancel()
+
+
+def chunks(items: List[T], size: int) -> Iterator[List[T]]:
+    for i in range(0, len(items), size):
+        yield items[i : i + size]
+
+
+async def achunks(items: AsyncIterator[T], size: int) -> AsyncIterator[List[T]]:
+    chunk: List[T] = []
+    async for item in items:
+        chunk.append(item)
+        if len(chunk) >= size:
+            yield chunk
+            chunk = []
+    if chunk:
+        yield chunk
+
+
+class MenuSettings(NamedTuple):
+    """A guilds menu settings in the order the menus take them"""
+
+    delete_message_after: bool = False
+    clear_reactions_after: bool = True
+    menu_timeout: int = 120
+
+
+class ParsedMessage(NamedTuple):
+    """The Spotify links found in a message and a search fallback from its embed"""
+
+    tracks: List[str]
+    albums: List[str]
+    playlists: List[str]
+    last_uri: str
+    query: Optional[str]
+
+
+def parse_spotify_message(message: discord.Message) -> ParsedMessage:
+    content = message.content
+    if message.embeds:
+        em_dict = message.embeds[0].to_dict()
+        content += " ".join(v for k, v in em_dict.items() if k in ["title", "description"])
+        if "title" in em_dict:
+            if "url" in em_dict["title"]:
+                content += " " + em_dict["title"]["url"]
+        if "fields" in em_dict:
+            for field in em_dict["fields"]:
+                content += " " + field["name"] + " " + field["value"]
+        log.debug(content)
+    content = content.replace("🧑‍🎨", ":artist:")
+    # because discord will replace this in URI's automatically 🙄
+    tracks = []
+    albums = []
+    playlists = []
+    last_uri = ""
+    for match in SPOTIFY_RE.finditer(content):
+        last_uri = f"spotify:{match.group(2)}:{match.group(3)}"
+        if match.group(2) == "track":
+            tracks.append(match.group(3))
+        if match.group(2) == "album":
+            albums.append(match.group(3))
+        if match.group(2) == "playlist":
+            playlists.append(match.group(3))
+    query = None
+    if message.embeds:
+        em = message.embeds[0]
+        if em.description:
+            look = f"{em.title if em.title else ''}-{em.description}"
+            find = re.search(r"\[(.+)\]", look)
+            if find:
+                query = find.group(1)
+        else:
+            query = em.title if em.title else ""
+        if query == "-":
+            query = None
+    return ParsedMessage(tracks, albums, playlists, last_uri, query or None)
+
+
 async def make_details(track: tekore.model.FullTrack, details: tekore.model.AudioFeatures) -> str:
     """
     {
@@ -281,11 +464,9 @@ class RecommendationsConverter(Converter):
         query = {}
         argument = argument.replace("🧑‍🎨", ":artist:")
         # because discord will replace this in URI's automatically 🙄
-        rec_str = r"|".join(i for i in VALID_RECOMMENDATIONS.keys())
-        find_rec = re.compile(fr"({rec_str})\W(.+)", flags=re.I)
         if not ctx.cog.GENRES:
             try:
-                ctx.cog.GENRES = await ctx.cog._spotify_client.recommendation_genre_seeds()
+                await ctx.cog.get_genres()
             except Exception:
                 raise BadArgument(
                     _(
@@ -294,10 +475,8 @@ class RecommendationsConverter(Converter):
                         " See `{prefix}spotify set creds` for more details."
                     ).format(prefix=ctx.clean_prefix)
                 )
-        genre_str = r"|".join(i for i in ctx.cog.GENRES)
-        find_genre = re.compile(fr"\b({genre_str})\b", flags=re.I)
-        find_extra = find_rec.finditer(argument)
-        genres = list(find_genre.findall(argument))
+        find_extra = _RE_RECOMMENDATION.finditer(argument)
+        genres = ctx.cog._genre_matcher.findall(argument)
         song_data = SPOTIFY_RE.finditer(argument)
         tracks: List[str] = []
         artists: List[str] = []
@@ -0,0 +1,147 @@
+"""
+MIT License
+
+Copyright (c) 2017 TrustyJAID
+
+Permission is hereby granted, free of charge, to any person obtaining a copy
+of this software and associated documentation files (the "Software"), to deal
+in the Software without restriction, including without limitation the rights
+to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+copies of the Software, and to permit persons to whom the Software is
+furnished to do so, subject to the following conditions:
+
+The above copyright notice and this permission notice shall be included in all
+copies or substantial portions of the Software.
+
+THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE
+SOFTWARE.
+"""
+
+import bisect
+import heapq
+import re
+import sys
+import unicodedata
+from collections import defaultdict
+from itertools import chain
+from typing import Any, Dict, Iterable, List, Set, Tuple
+
+_RE_NON_WORD = re.compile(r"[\W_]+")
+
+# sorts after any character a normalized token can contain
+_TOKEN_END = "\U0010ffff"
+
+
+def normalize(text: str) -> str:
+    """Casefold, strip accents and collapse punctuation into single spaces"""
+    text = unicodedata.normalize("NFKD", text.casefold())
+    text = "".join(c for c in text if not unicodedata.combining(c))
+    return _RE_NON_WORD.sub(" ", text).strip()
+
+
+def tokenize(text: str) -> List[str]:
+    return normalize(text).split()
+
+
+class NameIndex:
+    """
+    A prefix index over names for ranked lookups
+
+    Each item is stored with its primary name and optionally some extra
+    searchable terms (artist names for example). Every token of those is
+    kept once in a sorted list so the items with a token starting with
+    a query word are one bisected range, and a query only has to
+    intersect a few of those instead of scanning every name.
+    """
+
+    def __init__(self):
+        self._items: List[Any] = []
+        self._names: List[str] = []
+        self._tokens: List[Tuple[str, ...]] = []
+        self._exact: Dict[str, List[int]] = defaultdict(list)
+        # every (token, item) pair sorted by token, split into two lists
+        self._keys: List[str] = []
+        self._ids: List[int] = []
+        # pairs added since the last search, merged in by `_sort`
+        self._pending: List[Tuple[str, int]] = []
+
+    def __len__(self) -> int:
+        return len(self._items)
+
+    @classmethod
+    def from_items(cls, items: Iterable[Tuple[Any, str, Iterable[str]]]) -> "NameIndex":
+        index = cls()
+        for item, name, extra in items:
+            index.add(item, name, *extra)
+        index._sort()
+        return index
+
+    def add(self, item: Any, name: str, *extra: str) -> None:
+        idx = len(self._items)
+        norm = normalize(name)
+        tokens = dict.fromkeys(norm.split())
+        for term in extra:
+            tokens.update(dict.fromkeys(tokenize(term)))
+        # names and artists repeat a lot across a library so share the strings
+        token_tuple = tuple(sys.intern(t) for t in tokens)
+        self._items.append(item)
+        self._names.append(norm)
+        self._tokens.append(token_tuple)
+        self._exact[norm].append(idx)
+        self._pending.extend((t, idx) for t in token_tuple)
+
+    def _sort(self) -> None:
+        if not self._pending:
+            return
+        postings = sorted(chain(zip(self._keys, self._ids), self._pending))
+        self._keys = [t for t, _i in postings]
+        self._ids = [i for _t, i in postings]
+        self._pending = []
+
+    def exact(self, name: str) -> List[Any]:
+        """Items whose normalized name is exactly `name`"""
+        return [self._items[i] for i in self._exact.get(normalize(name), [])]
+
+    def _prefixed(self, prefix: str) -> Set[int]:
+        lo = bisect.bisect_left(self._keys, prefix)
+        hi = bisect.bisect_left(self._keys, prefix + _TOKEN_END, lo)
+        return set(self._ids[lo:hi])
+
+    def _candidates(self, tokens: List[str]) -> Set[int]:
+        self._sort()
+        sets = sorted((self._prefixed(t) for t in tokens), key=len)
+        candidates = sets[0]
+        for other in sets[1:]:
+            candidates &= other
+            if not candidates:
+                break
+        return candidates
+
+    def search(self, query: str, limit: int = 5) -> List[Any]:
+        """
+        Return up to `limit` items best matching `query`
+
+        Ranking prefers exact names, then names starting with the query,
+        then the number of query tokens matching whole words, then shorter names.
+        If no name contains every query token as a word prefix
+        this falls back to a plain substring scan of the names.
+        """
+        norm = normalize(query)
+        tokens = norm.split()
+        if not tokens:
+            return []
+        candidates = self._candidates(tokens)
+        if not candidates:
+            candidates = {i for i, name in enumerate(self._names) if norm in name}
+
+        def score(i: int) -> Tuple[bool, bool, int, int]:
+            name = self._names[i]
+            whole = sum(1 for t in tokens if t in self._tokens[i])
+            return (name == norm, name.startswith(norm), whole, -len(name))
+
+        return [self._items[i] for i in heapq.nlargest(limit, candidates, key=score)]
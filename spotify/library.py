@@ -0,0 +1,207 @@
+"""
+MIT License
+
+Copyright (c) 2017 TrustyJAID
+
+Permission is hereby granted, free of charge, to any person obtaining a copy
+of this software and associated documentation files (the "Software"), to deal
+in the Software without restriction, including without limitation the rights
+to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+copies of the Software, and to permit persons to whom the Software is
+furnished to do so, subject to the following conditions:
+
+The above copyright notice and this permission notice shall be included in all
+copies or substantial portions of the Software.
+
+THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE
+SOFTWARE.
+"""
+
+import json
+import logging
+import time
+from pathlib import Path
+from typing import List, NamedTuple, Optional, Tuple
+
+import tekore
+
+from .helpers import bounded_gather
+from .index import NameIndex
+
+log = logging.getLogger("red.trusty-cogs.spotify")
+
+
+class LibraryTrack(NamedTuple):
+    id: str
+    name: str
+    artists: Tuple[str, ...]
+    artist_ids: Tuple[str, ...]
+    added_at: str
+
+    @classmethod
+    def from_saved(cls, saved: tekore.model.SavedTrack) -> "LibraryTrack":
+        track = saved.track
+        return cls(
+            track.id,
+            track.name,
+            tuple(a.name for a in track.artists),
+            tuple(a.id for a in track.artists),
+            saved.added_at.isoformat(),
+        )
+
+    @property
+    def uri(self) -> str:
+        return f"spotify:track:{self.id}"
+
+
+class LibraryIndex:
+    """
+    A local copy of a users saved tracks that can be searched without the API
+
+    Saved tracks are returned newest first so after the first full sync
+    only the pages added since the newest `added_at` we have are fetched.
+    The already known tracks on the last of those pages have to match the
+    start of the index and the totals have to line up, otherwise something
+    was unliked and the whole library is fetched again. Removals further
+    back are caught by a full sync every `FULL_SYNC_INTERVAL` seconds.
+
+    Syncing doesn't touch the search index, searches keep using the
+    previous one until `build_index` is run again.
+    """
+
+    PAGE_SIZE = 50
+    FULL_SYNC_INTERVAL = 24 * 60 * 60
+
+    def __init__(
+        self,
+        tracks: Optional[List[LibraryTrack]] = None,
+        synced_at: float = 0,
+        full_synced_at: float = 0,
+        skipped: int = 0,
+    ):
+        self.tracks: List[LibraryTrack] = tracks or []
+        self.synced_at = synced_at
+        self.full_synced_at = full_synced_at
+        # saved items without a usable track, still counted in spotifys total
+        self.skipped = skipped
+        self._index: Optional[NameIndex] = None
+
+    def __len__(self) -> int:
+        return len(self.tracks)
+
+    @property
+    def watermark(self) -> Optional[str]:
+        return self.tracks[0].added_at if self.tracks else None
+
+    @property
+    def index(self) -> NameIndex:
+        if self._index is None:
+            self.build_index()
+        return self._index
+
+    def build_index(self) -> None:
+        """
+        Index the current tracks for searching
+
+        This takes a noticeable time for large libraries so
+        it's best run in an executor.
+        """
+        self._index = NameIndex.from_items((t, t.name, t.artists) for t in self.tracks)
+
+    def is_stale(self, ttl: float) -> bool:
+        return time.time() - self.synced_at > ttl
+
+    def search(self, query: str, limit: int = 10) -> List[LibraryTrack]:
+        return self.index.search(query, limit=limit)
+
+    async def sync(self, user_spotify: tekore.Spotify) -> int:
+        """
+        Bring the index up to date and return how many new tracks were found
+
+        This must be called inside `user_spotify.token_as()`.
+        """
+        if not self.tracks or time.time() - self.full_synced_at > self.FULL_SYNC_INTERVAL:
+            return await self._full_sync(user_spotify)
+        watermark = self.watermark
+        new: List[LibraryTrack] = []
+        skipped = 0
+        offset = 0
+        while True:
+            page = await user_spotify.saved_tracks(limit=self.PAGE_SIZE, offset=offset)
+            fresh = [i for i in page.items if i.added_at.isoformat() > watermark]
+            for item in fresh:
+                if item.track and item.track.id:
+                    new.append(LibraryTrack.from_saved(item))
+                else:
+                    skipped += 1
+            offset += self.PAGE_SIZE
+            if len(fresh) < len(page.items) or offset >= page.total:
+                break
+        # the rest of the last page should be the newest tracks we already had
+        known = [i.track.id for i in page.items[len(fresh) :] if i.track and i.track.id]
+        if known != [t.id for t in self.tracks[: len(known)]]:
+            log.debug("Saved tracks were removed, doing a full sync")
+            return await self._full_sync(user_spotify)
+        if len(new) + skipped + len(self.tracks) + self.skipped != page.total:
+            log.debug("Library totals differ, doing a full sync")
+            return await self._full_sync(user_spotify)
+        if new:
+            self.tracks = new + self.tracks
+        self.skipped += skipped
+        self.synced_at = time.time()
+        return len(new)
+
+    async def _full_sync(self, user_spotify: tekore.Spotify) -> int:
+        first = await user_spotify.saved_tracks(limit=self.PAGE_SIZE)
+        pages = [first]
+        if first.total > self.PAGE_SIZE:
+            pages += await bounded_gather(
+                user_spotify.saved_tracks(limit=self.PAGE_SIZE, offset=offset)
+                for offset in range(self.PAGE_SIZE, first.total, self.PAGE_SIZE)
+            )
+        old = len(self.tracks)
+        items = [i for page in pages for i in page.items]
+        self.tracks = [LibraryTrack.from_saved(i) for i in items if i.track and i.track.id]
+        self.skipped = len(items) - len(self.tracks)
+        self.synced_at = self.full_synced_at = time.time()
+        return max(0, len(self.tracks) - old)
+
+    def to_json(self) -> dict:
+        return {
+            "synced_at": self.synced_at,
+            "full_synced_at": self.full_synced_at,
+            "skipped": self.skipped,
+            "tracks": [list(t) for t in self.tracks],
+        }
+
+    @classmethod
+    def from_json(cls, data: dict) -> "LibraryIndex":
+        tracks = [
+            LibraryTrack(t[0], t[1], tuple(t[2]), tuple(t[3]), t[4]) for t in data["tracks"]
+        ]
+        return cls(
+            tracks, data.get("synced_at", 0), data.get("full_synced_at", 0), data.get("skipped", 0)
+        )
+
+    def save(self, path: Path) -> None:
+        path.parent.mkdir(parents=True, exist_ok=True)
+        tmp = path.with_suffix(".tmp")
+        with tmp.open("w", encoding="utf8") as outfile:
+            json.dump(self.to_json(), outfile, separators=(",", ":"))
+        tmp.replace(path)
+
+    @classmethod
+    def load(cls, path: Path) -> Optional["LibraryIndex"]:
+        try:
+            with path.open("r", encoding="utf8") as infile:
+                return cls.from_json(json.load(infile))
+        except FileNotFoundError:
+            return None
+        except (ValueError, KeyError, IndexError):
+            log.exception("Corrupt library index at %s", path)
+            return None
@@ -27,9 +27,10 @@ from __future__ import annotations
 import asyncio
 import json
 import logging
+import time
 from copy import copy
 from pathlib import Path
-from typing import Any, List, Tuple
+from typing import Any, Dict, List, Optional, Tuple
 
 import discord
 import tekore
@@ -46,6 +47,8 @@ from .helpers import (
     _draw_play,
     make_details,
 )
+from .components import Button, ButtonPress, Component, edit_components, send_button
+from .sender import PriorityHandle, request_priority
 
 log = logging.getLogger("red.Trusty-cogs.spotify")
 _ = Translator("Spotify", __file__)
@@ -108,24 +111,105 @@ class SpotifyTrackPages(menus.ListPageSource):
         if self.detailed:
             sp = tekore.Spotify(sender=menu.cog._sender)
             with sp.token_as(menu.user_token):
-                details = await sp.track_audio_features(track.id)
-
-            msg = await make_details(track, details)
-            em.add_field(name="Details", value=box(msg[:1000], lang="css"))
+                details = await menu.cog._audio_features.get(
+                    sp, track.id, batch=[t.id for t in self.entries]
+                )
+            if details:
+                msg = await make_details(track, details)
+                em.add_field(name="Details", value=box(msg[:1000], lang="css"))
         em.set_footer(
             text=_("Page") + f" {menu.current_page + 1}/{self.get_max_pages()}",
         )
         return em
 
 
-class SpotifyArtistPages(menus.ListPageSource):
-    def __init__(self, items: List[tekore.model.FullArtist], detailed: bool):
+class PrefetchPageSource(menus.ListPageSource):
+    """
+    A one item per page source that builds its neighbours pages in the background
+
+    Subclasses implement `fetch` for the part of a page that needs Spotify.
+    Its result is memoized per page and the next and previous pages are
+    fetched at background priority while the current one is shown. A page
+    reached before its prefetch finished has that prefetch promoted to
+    normal priority rather than being fetched twice.
+    """
+
+    def __init__(self, items: List[Any]):
         super().__init__(items, per_page=1)
         self.current_track = None
+        self._prefetched: Dict[int, asyncio.Task] = {}
+        # pages prefetched in the background, with the handle to promote them by
+        self._background: Dict[int, PriorityHandle] = {}
 
     def is_paginating(self):
         return True
 
+    async def fetch(self, menu: menus.MenuPages, sp: tekore.Spotify, item: Any) -> str:
+        """
+        Build the page text for `item`, subclasses must override this
+
+        `sp` is already using the menu users token.
+        """
+        raise NotImplementedError
+
+    def neighbours(self, item: Any) -> List[Any]:
+        """The items after `item`, wrapping around, nearest first"""
+        index = self.entries.index(item)
+        return self.entries[index + 1 :] + self.entries[:index]
+
+    async def _fetch_page(self, menu: menus.MenuPages, page_number: int) -> str:
+        sp = tekore.Spotify(sender=menu.cog._sender)
+        with sp.token_as(menu.user_token):
+            return await self.fetch(menu, sp, self.entries[page_number])
+
+    def _fetch_task(
+        self, menu: menus.MenuPages, page_number: int, background: bool = False
+    ) -> asyncio.Task:
+        task = self._prefetched.get(page_number)
+        if not background and page_number in self._background:
+            # the user is waiting on it now, anything it hasn't sent yet jumps the queue
+            self._background.pop(page_number).promote()
+        if task is None or (task.done() and (task.cancelled() or task.exception())):
+            if background:
+                handle = PriorityHandle()
+                with request_priority(handle):
+                    task = asyncio.ensure_future(self._fetch_page(menu, page_number))
+                self._background[page_number] = handle
+            else:
+                task = asyncio.ensure_future(self._fetch_page(menu, page_number))
+            # retrieve errors here so unused prefetches aren't logged
+            task.add_done_callback(lambda t: t.cancelled() or t.exception())
+            self._prefetched[page_number] = task
+        return task
+
+    async def page_data(self, menu: menus.MenuPages) -> str:
+        page_number = menu.current_page
+        data = await asyncio.shield(self._fetch_task(menu, page_number))
+        max_pages = self.get_max_pages()
+        for neighbour in {(page_number + 1) % max_pages, (page_number - 1) % max_pages}:
+            self._fetch_task(menu, neighbour, background=True)
+        return data
+
+    def cancel_prefetch(self) -> None:
+        for task in self._prefetched.values():
+            task.cancel()
+        self._prefetched.clear()
+        self._background.clear()
+
+
+class SpotifyArtistPages(PrefetchPageSource):
+    def __init__(self, items: List[tekore.model.FullArtist], detailed: bool):
+        super().__init__(items)
+
+    async def fetch(
+        self, menu: menus.MenuPages, sp: tekore.Spotify, artist: tekore.model.FullArtist
+    ) -> str:
+        cur = await sp.artist_top_tracks(artist.id, "from_token")
+        msg = _("Top Tracks\n")
+        for track in cur:
+            msg += f"[{track.name}](https://open.spotify.com/track/{track.id})\n"
+        return msg
+
     async def format_page(
         self, menu: menus.MenuPages, artist: tekore.model.FullArtist
     ) -> discord.Embed:
@@ -138,13 +222,7 @@ class SpotifyArtistPages(menus.ListPageSource):
             url=url,
             icon_url=SPOTIFY_LOGO,
         )
-        sp = tekore.Spotify(sender=menu.cog._sender)
-        with sp.token_as(menu.user_token):
-            cur = await sp.artist_top_tracks(artist.id, "from_token")
-        msg = _("Top Tracks\n")
-        for track in cur:
-            msg += f"[{track.name}](https://open.spotify.com/track/{track.id})\n"
-        em.description = msg
+        em.description = await self.page_data(menu)
         if artist.images:
             em.set_thumbnail(url=artist.images[0].url)
         em.set_footer(
@@ -153,13 +231,19 @@ class SpotifyArtistPages(menus.ListPageSource):
         return em
 
 
-class SpotifyAlbumPages(menus.ListPageSource):
+class SpotifyAlbumPages(PrefetchPageSource):
     def __init__(self, items: List[tekore.model.FullAlbum], detailed: bool):
-        super().__init__(items, per_page=1)
-        self.current_track = None
+        super().__init__(items)
 
-    def is_paginating(self):
-        return True
+    async def fetch(
+        self, menu: menus.MenuPages, sp: tekore.Spotify, album: tekore.model.FullAlbum
+    ) -> str:
+        msg = "Tracks:\n"
+        batch = [a.id for a in self.neighbours(album)]
+        cur = await menu.cog._metadata.get(sp, "album", album.id, batch)
+        for track in cur.tracks.items:
+            msg += f"[{track.name}](https://open.spotify.com/track/{track.id})\n"
+        return msg
 
     async def format_page(
         self, menu: menus.MenuPages, album: tekore.model.FullAlbum
@@ -175,13 +259,7 @@ class SpotifyAlbumPages(menus.ListPageSource):
             url=url,
             icon_url=SPOTIFY_LOGO,
         )
-        msg = "Tracks:\n"
-        sp = tekore.Spotify(sender=menu.cog._sender)
-        with sp.token_as(menu.user_token):
-            cur = await sp.album(album.id)
-        for track in cur.tracks.items:
-            msg += f"[{track.name}](https://open.spotify.com/track/{track.id})\n"
-        em.description = msg
+        em.description = await self.page_data(menu)
         if album.images:
             em.set_thumbnail(url=album.images[0].url)
         em.set_footer(
@@ -190,13 +268,20 @@ class SpotifyAlbumPages(menus.ListPageSource):
         return em
 
 
-class SpotifyPlaylistPages(menus.ListPageSource):
+class SpotifyPlaylistPages(PrefetchPageSource):
     def __init__(self, items: List[tekore.model.SimplePlaylist], detailed: bool):
-        super().__init__(items, per_page=1)
-        self.current_track = None
+        super().__init__(items)
 
-    def is_paginating(self):
-        return True
+    async def fetch(
+        self, menu: menus.MenuPages, sp: tekore.Spotify, playlist: tekore.model.SimplePlaylist
+    ) -> str:
+        description = ""
+        cur = await sp.playlist_items(playlist.id)
+        for track in cur.items[:10]:
+            description += (
+                f"[{track.track.name}](https://open.spotify.com/track/{track.track.id})\n"
+            )
+        return description
 
     async def format_page(
         self, menu: menus.MenuPages, playlist: tekore.model.SimplePlaylist
@@ -212,16 +297,7 @@ class SpotifyPlaylistPages(menus.ListPageSource):
             url=url,
             icon_url=SPOTIFY_LOGO,
         )
-        user_spotify = tekore.Spotify(sender=menu.cog._sender)
-        description = ""
-        with user_spotify.token_as(menu.user_token):
-            cur = await user_spotify.playlist_items(playlist.id)
-            for track in cur.items[:10]:
-                description += (
-                    f"[{track.track.name}](https://open.spotify.com/track/{track.track.id})\n"
-                )
-
-        em.description = description
+        em.description = await self.page_data(menu)
         if playlist.images:
             em.set_thumbnail(url=playlist.images[0].url)
         em.set_footer(
@@ -230,13 +306,25 @@ class SpotifyPlaylistPages(menus.ListPageSource):
         return em
 
 
-class SpotifyNewPages(menus.ListPageSource):
+class SpotifyNewPages(PrefetchPageSource):
     def __init__(self, items: List[tekore.model.SimplePlaylist]):
-        super().__init__(items, per_page=1)
-        self.current_track = None
+        super().__init__(items)
 
-    def is_paginating(self):
-        return True
+    async def fetch(
+        self, menu: menus.MenuPages, sp: tekore.Spotify, playlist: tekore.model.SimplePlaylist
+    ) -> str:
+        description = ""
+        if playlist.type == "playlist":
+            cur = await sp.playlist_items(playlist.id)
+            for track in cur.items[:10]:
+                description += f"[{track.track.name}](https://open.spotify.com/playlist/{track.track.id})\n"
+        if playlist.type == "album":
+            batch = [p.id for p in self.neighbours(playlist) if p.type == "album"]
+            album = await menu.cog._metadata.get(sp, "album", playlist.id, batch)
+            cur = album.tracks
+            for track in cur.items[:10]:
+                description += f"[{track.name}](https://open.spotify.com/album/{track.id})\n"
+        return description
 
     async def format_page(
         self, menu: menus.MenuPages, playlist: tekore.model.SimplePlaylist
@@ -252,20 +340,7 @@ class SpotifyNewPages(menus.ListPageSource):
             url=url,
             icon_url=SPOTIFY_LOGO,
         )
-        user_spotify = tekore.Spotify(sender=menu.cog._sender)
-        description = ""
-        with user_spotify.token_as(menu.user_token):
-            if playlist.type == "playlist":
-                cur = await user_spotify.playlist_items(playlist.id)
-                for track in cur.items[:10]:
-                    description += f"[{track.track.name}](https://open.spotify.com/playlist/{track.track.id})\n"
-            if playlist.type == "album":
-                album = await user_spotify.album(playlist.id)
-                cur = album.tracks
-                for track in cur.items[:10]:
-                    description += f"[{track.name}](https://open.spotify.com/album/{track.id})\n"
-
-        em.description = description
+        em.description = await self.page_data(menu)
         if playlist.images:
             em.set_thumbnail(url=playlist.images[0].url)
         em.set_footer(
@@ -364,10 +439,12 @@ class SpotifyRecentSongPages(menus.ListPageSource):
         if self.detailed:
             sp = tekore.Spotify(sender=menu.cog._sender)
             with sp.token_as(menu.user_token):
-                details = await sp.track_audio_features(history.track.id)
-
-            msg = await make_details(track, details)
-            em.add_field(name="Details", value=box(msg[:1000], lang="css"))
+                details = await menu.cog._audio_features.get(
+                    sp, track.id, batch=[h.track.id for h in self.entries]
+                )
+            if details:
+                msg = await make_details(track, details)
+                em.add_field(name="Details", value=box(msg[:1000], lang="css"))
         em.set_footer(
             text=f"Page {menu.current_page + 1}/{self.get_max_pages()} | Played at",
         )
@@ -457,6 +534,8 @@ class SpotifyPages(menus.PageSource):
         self.sender = sender
         self.detailed = detailed
         self.current_track = None
+        # playback already fetched elsewhere, used once by the next get_page
+        self.pending_state: Optional[tekore.model.CurrentlyPlayingContext] = None
 
     async def format_page(
         self,
@@ -500,10 +579,10 @@ class SpotifyPages(menus.PageSource):
             if self.detailed and not getattr(state.item, "is_local", False):
                 sp = tekore.Spotify(sender=self.sender)
                 with sp.token_as(self.user_token):
-                    details = await sp.track_audio_features(state.item.id)
-
-                msg = await make_details(state.item, details)
-                em.add_field(name="Details", value=box(msg[:1000], lang="css"))
+                    details = await menu.cog._audio_features.get(sp, state.item.id)
+                if details:
+                    msg = await make_details(state.item, details)
+                    em.add_field(name="Details", value=box(msg[:1000], lang="css"))
         except tekore.NotFound:
             pass
         em.set_thumbnail(url=image)
@@ -552,7 +631,9 @@ class SpotifyPages(menus.PageSource):
         try:
             user_spotify = tekore.Spotify(sender=self.sender)
             with user_spotify.token_as(self.user_token):
-                cur_state = await user_spotify.playback()
+                cur_state, self.pending_state = self.pending_state, None
+                if cur_state is None:
+                    cur_state = await user_spotify.playback()
                 if not cur_state:
                     raise NotPlaying
                 if not cur_state.item:
@@ -567,7 +648,211 @@ class SpotifyPages(menus.PageSource):
         return cur_state, is_liked
 
 
-class SpotifyUserMenu(menus.MenuPages, inherit_buttons=False):
+class MenuRouter:
+    """
+    Hands reaction events to the open menu on the reacted message
+
+    The cog listens for reactions once and looks the menu up by message id
+    instead of every open menu running its check on every reaction the bot sees.
+    """
+
+    def __init__(self):
+        self._menus: Dict[int, RoutedMenu] = {}
+        self.peak = 0
+
+    def __len__(self) -> int:
+        return len(self._menus)
+
+    def get(self, message_id: int) -> Optional[RoutedMenu]:
+        return self._menus.get(message_id)
+
+    def register(self, menu: RoutedMenu) -> None:
+        self._menus[menu.message.id] = menu
+        self.peak = max(self.peak, len(self._menus))
+
+    def unregister(self, menu: RoutedMenu) -> None:
+        # a new menu may have taken over the message already
+        if self._menus.get(menu.message.id) is menu:
+            del self._menus[menu.message.id]
+
+    def dispatch(self, payload: discord.RawReactionActionEvent) -> Optional[RoutedMenu]:
+        """Queue `payload` on its menu if it passes the check and return the menu"""
+        menu = self._menus.get(payload.message_id)
+        if menu is not None and menu.reaction_check(payload):
+            menu._reactions.put_nowait(payload)
+        return menu
+
+    def dispatch_interaction(self, data: Dict[str, Any]) -> Optional[RoutedMenu]:
+        """
+        Queue a raw component interaction on its menu by message id and custom_id
+
+        Returns the menu the interaction belongs to so it can be acknowledged.
+        """
+        message_id = int(data.get("message", {}).get("id", 0))
+        menu = self._menus.get(message_id)
+        if menu is None or not menu.use_buttons:
+            return None
+        emoji = menu.button_ids.get(data.get("data", {}).get("custom_id"))
+        if emoji is None:
+            # not one of the buttons this menu was sent with
+            return menu
+        user = data.get("member", {}).get("user") or data.get("user", {})
+        guild_id = data.get("guild_id")
+        payload = ButtonPress(
+            message_id,
+            int(data["channel_id"]),
+            int(guild_id) if guild_id else None,
+            int(user.get("id", 0)),
+            emoji,
+        )
+        if menu.reaction_check(payload):
+            menu._reactions.put_nowait(payload)
+        return menu
+
+    def stop(self) -> None:
+        for menu in list(self._menus.values()):
+            menu.stop()
+        self._menus.clear()
+
+
+class RoutedMenu(menus.MenuPages, inherit_buttons=False):
+    """
+    A menu that receives its reactions from the cogs `MenuRouter`
+
+    This replaces the pair of `wait_for` listeners the base menu
+    creates and tears down again after every single reaction.
+    In guilds that have buttons enabled the menu is sent with component
+    buttons instead of reactions, so it's ready after a single request.
+    """
+
+    # the minimum number of seconds between two renders from `request_render`
+    render_window = 1.0
+
+    def __init__(self, source: menus.PageSource, **kwargs: Any) -> None:
+        super().__init__(source, **kwargs)
+        self._reactions: asyncio.Queue = asyncio.Queue()
+        self._button_task: Optional[asyncio.Task] = None
+        self._render_task: Optional[asyncio.Task] = None
+        self._render_started = False
+        self._render_lock = asyncio.Lock()
+        self._last_render = 0.0
+        self.use_buttons = False
+        self.button_ids: Dict[str, discord.PartialEmoji] = {}
+
+    async def start(self, ctx: commands.Context, *, channel=None, wait=False):
+        # menus reusing an existing message keep the reactions it already has
+        self.use_buttons = self.message is None and self.cog.use_buttons(ctx.guild)
+        if not self.use_buttons:
+            return await super().start(ctx, channel=channel, wait=wait)
+        try:
+            del self.buttons
+        except AttributeError:
+            pass
+        self.bot = ctx.bot
+        self.ctx = ctx
+        self._author_id = ctx.author.id
+        self._event.clear()
+        # only the buttons reaction mode would add, some actions rely on skip_if to be safe
+        self.button_ids = {
+            str(emoji): emoji
+            for emoji, button in self.buttons.items()
+            if not button.skip_if(self)
+        }
+        self.message = await self.send_initial_message(ctx, channel or ctx.channel)
+        self._running = True
+        self._button_task = asyncio.create_task(self._internal_loop())
+        if wait:
+            await self._event.wait()
+
+    def stop(self):
+        super().stop()
+        if self._button_task is not None:
+            self._button_task.cancel()
+            self._button_task = None
+        if self._render_task is not None and not self._render_started:
+            self._render_task.cancel()
+
+    def request_render(self, page_number: int = 0, delay: float = 0.0) -> None:
+        """
+        Show `page_number` after `delay` seconds, coalescing repeated requests
+
+        A newer request replaces one that is still waiting so a burst of
+        button presses only fetches the page and edits the message once.
+        Renders are also kept `render_window` seconds apart.
+        """
+        if self._render_task is not None and not self._render_started:
+            self._render_task.cancel()
+        self._render_started = False
+        self._render_task = asyncio.create_task(self._render(page_number, delay))
+
+    async def _render(self, page_number: int, delay: float) -> None:
+        wait = max(delay, self._last_render + self.render_window - time.monotonic())
+        await asyncio.sleep(wait)
+        # from here on newer requests wait for this render instead of replacing it
+        self._render_started = True
+        async with self._render_lock:
+            if not self._running:
+                return
+            self._last_render = time.monotonic()
+            try:
+                await self.show_checked_page(page_number)
+            except Exception:
+                log.debug("Error rendering menu page %s", page_number, exc_info=True)
+
+    async def send(self, ctx: commands.Context, channel: discord.abc.Messageable, **kwargs):
+        """Send the menu message, with its buttons attached when they're enabled"""
+        if not self.use_buttons:
+            return await channel.send(**kwargs)
+        buttons = [Button(custom_id, emoji) for custom_id, emoji in self.button_ids.items()]
+        return await send_button(ctx, Component.rows(buttons), channel=channel, **kwargs)
+
+    async def _internal_loop(self):
+        router = self.cog._menu_router
+        router.register(self)
+        timed_out = False
+        try:
+            while self._running:
+                payload = await asyncio.wait_for(self._reactions.get(), timeout=self.timeout)
+                asyncio.create_task(self.update(payload))
+        except asyncio.TimeoutError:
+            timed_out = True
+        finally:
+            router.unregister(self)
+            self._event.set()
+
+            try:
+                await self.finalize(timed_out)
+            except Exception:
+                pass
+
+            # Can't do any requests if the bot is closed
+            if self.bot.is_closed():
+                return
+
+            # Wrap it in another block anyway just to ensure
+            # nothing leaks out during clean-up
+            try:
+                if self.delete_message_after:
+                    return await self.message.delete()
+
+                if self.clear_reactions_after and self.use_buttons:
+                    return await edit_components(self.bot, self.message, [])
+
+                if self.clear_reactions_after:
+                    if self._can_remove_reactions:
+                        return await self.message.clear_reactions()
+
+                    me = discord.Object(id=self.bot.user.id)
+                    for button_emoji in self.buttons:
+                        try:
+                            await self.message.remove_reaction(button_emoji, me)
+                        except discord.HTTPException:
+                            continue
+            except Exception:
+                pass
+
+
+class SpotifyUserMenu(RoutedMenu, inherit_buttons=False):
     def __init__(
         self,
         source: menus.PageSource,
@@ -635,106 +920,25 @@ class SpotifyUserMenu(menus.MenuPages, inherit_buttons=False):
         )
 
     async def finalize(self, timed_out: bool):
-        del self.cog.user_menus[self.ctx.author.id]
+        self.cog._playback_poller.unsubscribe(self.ctx.author.id, self)
+        self.cog.user_menus.pop(self.ctx.author.id, None)
 
-    async def edit_menu_page_auto(self):
+    async def on_playback_update(self, cur_state: tekore.model.CurrentlyPlayingContext):
         """
-        This is used to handled editing the menu when
-        we detect that the song has changed from spotify
-        It has no return so as not to edit the length
-        of timeout on the menu itself so it returns nothing
+        Called by the cogs playback poller with the users current playback
 
         This is a minor quality of life feature so that
         if the track changes while you do the command it doesn't
         show an old song when you're already listening to a new song
         """
-        while self._running:
-            await asyncio.sleep(15)
-            user_spotify = tekore.Spotify(sender=self.source.sender)
-            with user_spotify.token_as(self.source.user_token):
-                cur_state = await user_spotify.playback()
-                if not cur_state and not cur_state.item:
-                    continue
-                if cur_state.item.id != self.source.current_track.id:
-                    await self.show_checked_page(0)
-
-    async def _internal_loop(self):
-        try:
-            self.__timed_out = False
-            loop = self.bot.loop
-            # Ensure the name exists for the cancellation handling
-            tasks = []
-            while self._running:
-                tasks = [
-                    asyncio.ensure_future(self.edit_menu_page_auto()),
-                    asyncio.ensure_future(
-                        self.bot.wait_for("raw_reaction_add", check=self.reaction_check)
-                    ),
-                    asyncio.ensure_future(
-                        self.bot.wait_for("raw_reaction_remove", check=self.reaction_check)
-                    ),
-                ]
-                done, pending = await asyncio.wait(
-                    tasks, timeout=self.timeout, return_when=asyncio.FIRST_COMPLETED
-                )
-                for task in pending:
-                    task.cancel()
-
-                if len(done) == 0:
-                    raise asyncio.TimeoutError()
-
-                # Exception will propagate if e.g. cancelled or timed out
-                payload = done.pop().result()
-                loop.create_task(self.update(payload))
-
-                # NOTE: Removing the reaction ourselves after it's been done when
-                # mixed with the checks above is incredibly racy.
-                # There is no guarantee when the MESSAGE_REACTION_REMOVE event will
-                # be called, and chances are when it does happen it'll always be
-                # after the remove_reaction HTTP call has returned back to the caller
-                # which means that the stuff above will catch the reaction that we
-                # just removed.
-
-                # For the future sake of myself and to save myself the hours in the future
-                # consider this my warning.
-
-        except asyncio.TimeoutError:
-            self.__timed_out = True
-        finally:
-            self._event.set()
-
-            # Cancel any outstanding tasks (if any)
-            for task in tasks:
-                task.cancel()
-
-            try:
-                await self.finalize(self.__timed_out)
-            except Exception:
-                pass
-            finally:
-                self.__timed_out = False
-
-            # Can't do any requests if the bot is closed
-            if self.bot.is_closed():
-                return
-
-            # Wrap it in another block anyway just to ensure
-            # nothing leaks out during clean-up
-            try:
-                if self.delete_message_after:
-                    return await self.message.delete()
-
-                if self.clear_reactions_after:
-                    if self._can_remove_reactions:
-                        return await self.message.clear_reactions()
-
-                    for button_emoji in self.buttons:
-                        try:
-                            await self.message.remove_reaction(button_emoji, self.__me)
-                        except discord.HTTPException:
-                            continue
-            except Exception:
-                pass
+        if not self._running or not isinstance(self.source, SpotifyPages):
+            return
+        if not cur_state or not cur_state.item:
+            return
+        if self.source.current_track is None or cur_state.item.id != self.source.current_track.id:
+            # the poller already has the playback so the render only checks if it's liked
+            self.source.pending_state = cur_state
+            self.request_render(0)
 
     async def update(self, payload):
         """|coro|
@@ -751,6 +955,9 @@ class SpotifyUserMenu(menus.MenuPages, inherit_buttons=False):
         button = self.buttons[payload.emoji]
         if not self._running:
             return
+        if isinstance(self.source, SpotifyPages):
+            # the control is about to change playback so the polled state is stale
+            self.source.pending_state = None
 
         try:
             if button.lock:
@@ -770,9 +977,9 @@ class SpotifyUserMenu(menus.MenuPages, inherit_buttons=False):
         """
         page = await self._source.get_page(0)
         kwargs = await self._get_kwargs_from_page(page)
-        msg = await channel.send(**kwargs)
-        self.cog.current_menus[msg.id] = ctx.author.id
+        msg = await self.send(ctx, channel, **kwargs)
         self.cog.user_menus[ctx.author.id] = msg.jump_url
+        self.cog._playback_poller.subscribe(ctx.author.id, self)
         return msg
 
     async def show_page(self, page_number):
@@ -855,8 +1062,7 @@ class SpotifyUserMenu(menus.MenuPages, inherit_buttons=False):
             self._source = SpotifyPages(
                 user_token=self.user_token, sender=self.cog._sender, detailed=self.source.detailed
             )
-        await asyncio.sleep(1)
-        await self.show_checked_page(0)
+        self.request_render(0, delay=1)
 
     async def repeat(self, payload):
         """go to the next page"""
@@ -889,8 +1095,7 @@ class SpotifyUserMenu(menus.MenuPages, inherit_buttons=False):
             self._source = SpotifyPages(
                 user_token=self.user_token, sender=self.cog._sender, detailed=self.source.detailed
             )
-        await asyncio.sleep(1)
-        await self.show_checked_page(0)
+        self.request_render(0, delay=1)
 
     async def shuffle(self, payload):
         """go to the next page"""
@@ -922,8 +1127,7 @@ class SpotifyUserMenu(menus.MenuPages, inherit_buttons=False):
             self._source = SpotifyPages(
                 user_token=self.user_token, sender=self.cog._sender, detailed=self.source.detailed
             )
-        await asyncio.sleep(1)
-        await self.show_checked_page(0)
+        self.request_render(0, delay=1)
 
     async def like_song(self, payload):
         """go to the next page"""
@@ -954,7 +1158,7 @@ class SpotifyUserMenu(menus.MenuPages, inherit_buttons=False):
             self._source = SpotifyPages(
                 user_token=self.user_token, sender=self.cog._sender, detailed=self.source.detailed
             )
-        await self.show_checked_page(0)
+        self.request_render(0)
 
     async def skip_previous(self, payload):
         """go to the first page"""
@@ -980,8 +1184,7 @@ class SpotifyUserMenu(menus.MenuPages, inherit_buttons=False):
             self._source = SpotifyPages(
                 user_token=self.user_token, sender=self.cog._sender, detailed=self.source.detailed
             )
-        await asyncio.sleep(1)
-        await self.show_page(0)
+        self.request_render(0, delay=1)
 
     async def skip_next(self, payload):
         """go to the last page"""
@@ -1007,21 +1210,18 @@ class SpotifyUserMenu(menus.MenuPages, inherit_buttons=False):
             self._source = SpotifyPages(
                 user_token=self.user_token, sender=self.cog._sender, detailed=self.source.detailed
             )
-        await asyncio.sleep(1)
-        await self.show_page(0)
+        self.request_render(0, delay=1)
 
     @menus.button("\N{CROSS MARK}")
     async def stop_pages(self, payload: discord.RawReactionActionEvent) -> None:
         """stops the pagination session."""
         self.stop()
-        if self.message.id in self.cog.current_menus:
-            del self.cog.current_menus[self.message.id]
         if self.ctx.author.id in self.cog.user_menus:
             del self.cog.user_menus[self.ctx.author.id]
         await self.message.delete()
 
 
-class SpotifySearchMenu(menus.MenuPages, inherit_buttons=False):
+class SpotifySearchMenu(RoutedMenu, inherit_buttons=False):
     def __init__(
         self,
         source: menus.PageSource,
@@ -1104,6 +1304,10 @@ class SpotifySearchMenu(menus.MenuPages, inherit_buttons=False):
             )
         )
 
+    async def finalize(self, timed_out: bool):
+        if isinstance(self._source, PrefetchPageSource):
+            self._source.cancel_prefetch()
+
     async def update(self, payload):
         """|coro|
 
@@ -1136,8 +1340,7 @@ class SpotifySearchMenu(menus.MenuPages, inherit_buttons=False):
         """
         page = await self._source.get_page(0)
         kwargs = await self._get_kwargs_from_page(page)
-        msg = await channel.send(**kwargs)
-        self.cog.current_menus[msg.id] = ctx.author.id
+        msg = await self.send(ctx, channel, **kwargs)
         return msg
 
     async def show_page(self, page_number):
@@ -1340,11 +1543,10 @@ class SpotifySearchMenu(menus.MenuPages, inherit_buttons=False):
     async def stop_pages(self, payload: discord.RawReactionActionEvent) -> None:
         """stops the pagination session."""
         self.stop()
-        del self.cog.current_menus[self.message.id]
         await self.message.delete()
 
 
-class SpotifyBaseMenu(menus.MenuPages, inherit_buttons=False):
+class SpotifyBaseMenu(RoutedMenu, inherit_buttons=False):
     def __init__(
         self,
         source: menus.PageSource,
@@ -1400,8 +1602,7 @@ class SpotifyBaseMenu(menus.MenuPages, inherit_buttons=False):
         """
         page = await self._source.get_page(0)
         kwargs = await self._get_kwargs_from_page(page)
-        msg = await channel.send(**kwargs)
-        self.cog.current_menus[msg.id] = ctx.author.id
+        msg = await self.send(ctx, channel, **kwargs)
         return msg
 
     async def show_page(self, page_number):
@@ -1485,5 +1686,4 @@ class SpotifyBaseMenu(menus.MenuPages, inherit_buttons=False):
     async def stop_pages(self, payload: discord.RawReactionActionEvent) -> None:
         """stops the pagination session."""
         self.stop()
-        del self.cog.current_menus[self.message.id]
         await self.message.delete()
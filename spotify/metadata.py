@@ -0,0 +1,207 @@
+"""
+MIT License
+
+Copyright (c) 2017 TrustyJAID
+
+Permission is hereby granted, free of charge, to any person obtaining a copy
+of this software and associated documentation files (the "Software"), to deal
+in the Software without restriction, including without limitation the rights
+to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+copies of the Software, and to permit persons to whom the Software is
+furnished to do so, subject to the following conditions:
+
+The above copyright notice and this permission notice shall be included in all
+copies or substantial portions of the Software.
+
+THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE
+SOFTWARE.
+"""
+
+import asyncio
+import json
+import logging
+import sqlite3
+import time
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+from typing import Any, Dict, Iterable, List, NamedTuple, Optional, Tuple, Type
+
+import tekore
+
+from .cache import TTLCache
+from .helpers import bounded_gather, chunks
+
+log = logging.getLogger("red.trusty-cogs.spotify")
+
+
+class MetadataKind(NamedTuple):
+    model: Type[tekore.model.Model]
+    # how many ids the multi-id endpoint accepts
+    batch_size: int
+    ttl: float
+
+
+KINDS: Dict[str, MetadataKind] = {
+    "track": MetadataKind(tekore.model.FullTrack, 50, 7 * 24 * 60 * 60),
+    "album": MetadataKind(tekore.model.FullAlbum, 20, 7 * 24 * 60 * 60),
+}
+
+
+class MetadataStore:
+    """
+    A persistent cache of track and album objects shared by every user
+
+    Lookups go through an in memory LRU, then a SQLite file and finally
+    the multi-id endpoints for whatever is still missing. Objects are
+    fetched without a market so they're the same for everyone and can be
+    served to any user after a restart.
+    The database is only ever touched from a single worker thread.
+    """
+
+    def __init__(self, path: Path, max_size: int = 2048):
+        self.path = path
+        self._cache = TTLCache(max_size=max_size)
+        self._pending: Dict[Tuple[str, str], asyncio.Future] = {}
+        self._executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix="spotify-metadata")
+        self._conn: Optional[sqlite3.Connection] = None
+
+    def _connect(self) -> sqlite3.Connection:
+        if self._conn is None:
+            self._conn = sqlite3.connect(str(self.path))
+            self._conn.execute("PRAGMA journal_mode=WAL")
+            self._conn.execute(
+                "CREATE TABLE IF NOT EXISTS metadata ("
+                "kind TEXT NOT NULL, id TEXT NOT NULL, data TEXT NOT NULL, expires REAL NOT NULL, "
+                "PRIMARY KEY (kind, id))"
+            )
+            self._conn.execute("DELETE FROM metadata WHERE expires < ?", (time.time(),))
+            self._conn.commit()
+        return self._conn
+
+    def _load(self, kind: str, ids: List[str]) -> Dict[str, Tuple[str, float]]:
+        conn = self._connect()
+        found = {}
+        # stay under sqlites default limit on query parameters
+        for chunk in chunks(ids, 500):
+            rows = conn.execute(
+                "SELECT id, data, expires FROM metadata WHERE kind = ? AND id IN ({}) "
+                "AND expires > ?".format(",".join("?" * len(chunk))),
+                (kind, *chunk, time.time()),
+            )
+            found.update((i, (data, expires)) for i, data, expires in rows)
+        return found
+
+    def _save(self, rows: List[Tuple[str, str, str, float]]) -> None:
+        conn = self._connect()
+        conn.executemany("INSERT OR REPLACE INTO metadata VALUES (?, ?, ?, ?)", rows)
+        conn.commit()
+
+    def _close(self) -> None:
+        if self._conn is not None:
+            self._conn.close()
+            self._conn = None
+
+    async def _run(self, func, *args) -> Any:
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(self._executor, func, *args)
+
+    async def get(
+        self, user_spotify: tekore.Spotify, kind: str, item_id: str, batch: Iterable[str] = ()
+    ) -> Optional[tekore.model.Model]:
+        """
+        Get a single object
+
+        If it has to be fetched it's requested along with the first uncached
+        ids from `batch` that still fit in the same request.
+        This must be called inside `user_spotify.token_as()`.
+        """
+        key = (kind, item_id)
+        if key in self._cache:
+            return self._cache.get(key)
+        extra = [i for i in batch if i and i != item_id and (kind, i) not in self._cache]
+        items = await self.get_many(
+            user_spotify, kind, [item_id, *extra[: KINDS[kind].batch_size - 1]]
+        )
+        return items[0]
+
+    async def get_many(
+        self, user_spotify: tekore.Spotify, kind: str, ids: Iterable[str]
+    ) -> List[Optional[tekore.model.Model]]:
+        """
+        Get objects of `kind` for every id in order, `None` for ids Spotify doesn't know
+
+        This must be called inside `user_spotify.token_as()`.
+        """
+        ids = [i for i in ids if i]
+        missing = [
+            i
+            for i in dict.fromkeys(ids)
+            if (kind, i) not in self._cache and (kind, i) not in self._pending
+        ]
+        if missing:
+            await self._fill(user_spotify, kind, missing)
+        results = []
+        for item_id in ids:
+            key = (kind, item_id)
+            if key in self._pending:
+                await asyncio.shield(self._pending[key])
+            results.append(self._cache.get(key))
+        return results
+
+    async def _fill(self, user_spotify: tekore.Spotify, kind: str, ids: List[str]) -> None:
+        info = KINDS[kind]
+        loop = asyncio.get_running_loop()
+        futures = {i: loop.create_future() for i in ids}
+        self._pending.update(((kind, i), f) for i, f in futures.items())
+        try:
+            try:
+                stored = await self._run(self._load, kind, ids)
+            except sqlite3.Error:
+                log.exception("Error reading the metadata cache")
+                stored = {}
+            for item_id, (data, expires) in stored.items():
+                self._set(kind, item_id, info.model(**json.loads(data)), expires)
+            fetch = [i for i in ids if i not in stored]
+            if not fetch:
+                return
+            endpoint = getattr(user_spotify, f"{kind}s")
+            pages = await bounded_gather(
+                endpoint(chunk) for chunk in chunks(fetch, info.batch_size)
+            )
+            expires = time.time() + info.ttl
+            rows = []
+            for item_id, item in zip(fetch, (i for page in pages for i in page)):
+                self._set(kind, item_id, item, expires)
+                if item is not None:
+                    rows.append((kind, item_id, item.json(), expires))
+            if rows:
+                try:
+                    await self._run(self._save, rows)
+                except sqlite3.Error:
+                    log.exception("Error writing to the metadata cache")
+        except Exception as e:
+            for future in futures.values():
+                if not future.done():
+                    future.set_exception(e)
+                    # mark it as retrieved so it isn't logged when nobody is waiting
+                    future.exception()
+            raise
+        finally:
+            for item_id, future in futures.items():
+                self._pending.pop((kind, item_id), None)
+                if not future.done():
+                    future.set_result(None)
+
+    def _set(
+        self, kind: str, item_id: str, item: Optional[tekore.model.Model], expires: float
+    ) -> None:
+        self._cache.set((kind, item_id), item, ttl=max(1.0, expires - time.time()))
+
+    def close(self) -> None:
+        self._executor.submit(self._close)
+        self._executor.shutdown(wait=False)
@@ -0,0 +1,129 @@
+"""
+MIT License
+
+Copyright (c) 2017 TrustyJAID
+
+Permission is hereby granted, free of charge, to any person obtaining a copy
+of this software and associated documentation files (the "Software"), to deal
+in the Software without restriction, including without limitation the rights
+to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+copies of the Software, and to permit persons to whom the Software is
+furnished to do so, subject to the following conditions:
+
+The above copyright notice and this permission notice shall be included in all
+copies or substantial portions of the Software.
+
+THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE
+SOFTWARE.
+"""
+
+import asyncio
+import logging
+from typing import Dict, List, Optional, Set
+
+import tekore
+from redbot.core import commands
+
+from .sender import RequestPriority, request_priority, set_request_command
+
+log = logging.getLogger("red.trusty-cogs.spotify")
+
+
+class PlaybackPoller:
+    """
+    Polls playback once per user and fans the result out to all their open menus
+
+    Rather than a fixed interval the poller sleeps until shortly after
+    the current track should end, capped at `max_interval` so changes
+    made outside of discord are still picked up.
+    """
+
+    def __init__(
+        self,
+        cog: commands.Cog,
+        min_interval: float = 2.0,
+        max_interval: float = 60.0,
+        idle_interval: float = 15.0,
+    ):
+        self.cog = cog
+        self.min_interval = min_interval
+        self.max_interval = max_interval
+        self.idle_interval = idle_interval
+        self._menus: Dict[int, Set[object]] = {}
+        self._tasks: Dict[int, asyncio.Task] = {}
+
+    def subscribe(self, user_id: int, menu: object) -> None:
+        self._menus.setdefault(user_id, set()).add(menu)
+        if user_id not in self._tasks:
+            self._tasks[user_id] = self.cog.bot.loop.create_task(self._poll(user_id))
+
+    def unsubscribe(self, user_id: int, menu: object) -> None:
+        menus = self._menus.get(user_id)
+        if menus is None:
+            return
+        menus.discard(menu)
+        if not menus:
+            del self._menus[user_id]
+            task = self._tasks.pop(user_id, None)
+            if task is not None:
+                task.cancel()
+
+    def stop(self) -> None:
+        for task in self._tasks.values():
+            task.cancel()
+        self._tasks.clear()
+        self._menus.clear()
+
+    def next_interval(self, cur: Optional[tekore.model.CurrentlyPlayingContext]) -> float:
+        if not cur or not cur.item or not cur.is_playing:
+            return self.idle_interval
+        remaining = (cur.item.duration_ms - (cur.progress_ms or 0)) / 1000
+        return max(self.min_interval, min(self.max_interval, remaining + 1))
+
+    async def _poll(self, user_id: int) -> None:
+        set_request_command("playback poller")
+        delay = self.idle_interval
+        failures = 0
+        try:
+            while self._menus.get(user_id):
+                await asyncio.sleep(delay)
+                menus = list(self._menus.get(user_id, []))
+                if not menus:
+                    break
+                try:
+                    cur = await self._fetch_playback(user_id, menus)
+                except tekore.HTTPError:
+                    log.debug("Error polling playback for %s", user_id, exc_info=True)
+                    delay = self.idle_interval
+                    continue
+                except Exception:
+                    # keep polling for the menus still open, just less often
+                    failures += 1
+                    log.exception("Error polling playback for %s", user_id)
+                    delay = min(self.max_interval, self.idle_interval * 2**failures)
+                    continue
+                failures = 0
+                for menu in menus:
+                    # one broken menu shouldn't stop the others updating
+                    try:
+                        await menu.on_playback_update(cur)
+                    except Exception:
+                        log.exception("Error updating menu from playback")
+                delay = self.next_interval(cur)
+        finally:
+            if self._tasks.get(user_id) is asyncio.current_task():
+                del self._tasks[user_id]
+
+    async def _fetch_playback(
+        self, user_id: int, menus: List[object]
+    ) -> Optional[tekore.model.CurrentlyPlayingContext]:
+        user_token = self.cog._user_tokens.get(user_id) or menus[0].user_token
+        user_spotify = tekore.Spotify(sender=self.cog._sender)
+        with request_priority(RequestPriority.BACKGROUND):
+            with user_spotify.token_as(user_token):
+                return await user_spotify.playback()
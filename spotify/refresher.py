@@ -0,0 +1,142 @@
+"""
+MIT License
+
+Copyright (c) 2017 TrustyJAID
+
+Permission is hereby granted, free of charge, to any person obtaining a copy
+of this software and associated documentation files (the "Software"), to deal
+in the Software without restriction, including without limitation the rights
+to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+copies of the Software, and to permit persons to whom the Software is
+furnished to do so, subject to the following conditions:
+
+The above copyright notice and this permission notice shall be included in all
+copies or substantial portions of the Software.
+
+THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE
+SOFTWARE.
+"""
+
+import asyncio
+import heapq
+import logging
+import time
+from typing import Dict, List, Optional, Tuple
+
+import discord
+import tekore
+from redbot.core import commands
+
+from .sender import RequestPriority, request_priority, set_request_command
+
+log = logging.getLogger("red.trusty-cogs.spotify")
+
+
+class TokenRefresher:
+    """
+    Refreshes the tokens of recently active users before they expire
+
+    Users are kept in a min-heap keyed by when their token expires and a
+    single task sleeps until the soonest one is due. Anyone who hasn't
+    used the cog for `idle_timeout` seconds is dropped so their token is
+    refreshed lazily again the next time they show up.
+    """
+
+    def __init__(
+        self,
+        cog: commands.Cog,
+        lead_time: float = 300.0,
+        idle_timeout: float = 3600.0,
+        retry_delay: float = 60.0,
+    ):
+        self.cog = cog
+        self.lead_time = lead_time
+        self.idle_timeout = idle_timeout
+        self.retry_delay = retry_delay
+        self._heap: List[Tuple[float, int]] = []
+        self._scheduled: Dict[int, float] = {}
+        self._last_active: Dict[int, float] = {}
+        self._wakeup = asyncio.Event()
+        self._task: Optional[asyncio.Task] = None
+
+    def __len__(self) -> int:
+        return len(self._scheduled)
+
+    def touch(self, user_id: int, user_token: tekore.Token) -> None:
+        """Mark a user as active and make sure their token is scheduled"""
+        self._last_active[user_id] = time.time()
+        if user_token.refresh_token is None:
+            return
+        self._schedule(user_id, user_token.expires_at - self.lead_time)
+
+    def forget(self, user_id: int) -> None:
+        self._last_active.pop(user_id, None)
+        # the heap entry is skipped once it no longer matches
+        self._scheduled.pop(user_id, None)
+
+    def stop(self) -> None:
+        if self._task is not None:
+            self._task.cancel()
+            self._task = None
+        self._heap.clear()
+        self._scheduled.clear()
+        self._last_active.clear()
+
+    def _schedule(self, user_id: int, due: float) -> None:
+        if self._scheduled.get(user_id) == due:
+            return
+        self._scheduled[user_id] = due
+        heapq.heappush(self._heap, (due, user_id))
+        if self._heap[0][1] == user_id:
+            self._wakeup.set()
+        if self._task is None or self._task.done():
+            self._task = self.cog.bot.loop.create_task(self._run())
+
+    async def _run(self) -> None:
+        set_request_command("token refresher")
+        while self._heap:
+            due, user_id = self._heap[0]
+            delay = due - time.time()
+            if delay > 0:
+                self._wakeup.clear()
+                try:
+                    await asyncio.wait_for(self._wakeup.wait(), delay)
+                except asyncio.TimeoutError:
+                    pass
+                continue
+            heapq.heappop(self._heap)
+            if self._scheduled.get(user_id) != due:
+                continue
+            del self._scheduled[user_id]
+            if time.time() - self._last_active.get(user_id, 0) > self.idle_timeout:
+                self._last_active.pop(user_id, None)
+                continue
+            await self._refresh(user_id)
+
+    async def _refresh(self, user_id: int) -> None:
+        user_token = self.cog._user_tokens.get(user_id)
+        if user_token is None:
+            return
+        if user_token.expires_at - self.lead_time > time.time():
+            # already refreshed by a command in the meantime
+            self._schedule(user_id, user_token.expires_at - self.lead_time)
+            return
+        try:
+            with request_priority(RequestPriority.BACKGROUND):
+                user_token = await self.cog.refresh_user_token(
+                    discord.Object(id=user_id), user_token
+                )
+        except tekore.BadRequest:
+            # revoked, get_user_auth clears it the next time they use a command
+            log.debug("Refresh token for %s has been revoked", user_id)
+            return
+        except Exception:
+            log.debug("Error refreshing the token for %s", user_id, exc_info=True)
+            self._schedule(user_id, time.time() + self.retry_delay)
+            return
+        self._schedule(user_id, user_token.expires_at - self.lead_time)
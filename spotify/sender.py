@@ -0,0 +1,393 @@
+"""
+MIT License
+
+Copyright (c) 2017 TrustyJAID
+
+Permission is hereby granted, free of charge, to any person obtaining a copy
+of this software and associated documentation files (the "Software"), to deal
+in the Software without restriction, including without limitation the rights
+to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+copies of the Software, and to permit persons to whom the Software is
+furnished to do so, subject to the following conditions:
+
+The above copyright notice and this permission notice shall be included in all
+copies or substantial portions of the Software.
+
+THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE
+SOFTWARE.
+"""
+
+import asyncio
+import bisect
+import heapq
+import itertools
+import logging
+import random
+import time
+from collections import Counter
+from contextlib import contextmanager
+from contextvars import ContextVar
+from enum import IntEnum
+from typing import Dict, Iterator, List, Optional, Tuple, Union
+from urllib.parse import urlsplit
+
+import tekore
+
+log = logging.getLogger("red.trusty-cogs.spotify")
+
+# collections whose next path segment is an id, e.g. `users/{id}/playlists`
+_ID_COLLECTIONS = frozenset(
+    {
+        "albums",
+        "artists",
+        "audio-analysis",
+        "audio-features",
+        "audiobooks",
+        "categories",
+        "chapters",
+        "episodes",
+        "playlists",
+        "shows",
+        "tracks",
+        "users",
+    }
+)
+
+
+class RequestPriority(IntEnum):
+    INTERACTIVE = 0
+    BACKGROUND = 1
+
+
+class PriorityHandle:
+    """
+    A request priority that can be raised after the requests are queued
+
+    Used for background work whose result may be wanted right away,
+    like a prefetched menu page the user has just turned to. `promote`
+    moves requests still waiting for a token up the queue and applies
+    to any made afterwards, requests already sent carry on as they are.
+    """
+
+    def __init__(self, priority: RequestPriority = RequestPriority.BACKGROUND):
+        self.priority = priority
+        self._waiting: List[Tuple["TokenBucket", List[int]]] = []
+
+    def promote(self, priority: RequestPriority = RequestPriority.INTERACTIVE) -> None:
+        if priority >= self.priority:
+            return
+        self.priority = priority
+        for bucket, entry in self._waiting:
+            bucket.reprioritise(entry, priority)
+
+
+_priority: ContextVar[Union[RequestPriority, PriorityHandle]] = ContextVar(
+    "spotify_request_priority", default=RequestPriority.INTERACTIVE
+)
+
+
+@contextmanager
+def request_priority(priority: Union[RequestPriority, PriorityHandle]) -> Iterator[None]:
+    """
+    Set the priority of every Spotify request made inside this block
+
+    Requests default to `RequestPriority.INTERACTIVE` so only background
+    work like pollers needs to use this.
+    """
+    token = _priority.set(priority)
+    try:
+        yield
+    finally:
+        _priority.reset(token)
+
+
+_command: ContextVar[Optional[str]] = ContextVar("spotify_request_command", default=None)
+
+
+def set_request_command(name: Optional[str]) -> None:
+    """
+    Attribute every Spotify request made from now on in this task to `name`
+
+    Tasks started afterwards inherit it so concurrent fetches
+    are still counted against the command that started them.
+    """
+    _command.set(name)
+
+
+def endpoint_name(url: str) -> str:
+    """
+    Turn a request URL into a stable endpoint name
+
+    e.g. `https://api.spotify.com/v1/playlists/37i9dQZF1DXcBWIGoYBM5M/tracks`
+    becomes `playlists/{id}/tracks`. Ids are found by where they sit in
+    the route rather than what they look like, so `me/tracks/contains`
+    is left alone while `users/johnsmith/playlists` still collapses.
+    """
+    parts = urlsplit(url)
+    path = parts.path
+    if path.startswith("/v1/"):
+        path = path[4:]
+    else:
+        path = parts.netloc.split(".")[0] + path
+    segments = path.strip("/").split("/")
+    for i in range(1, len(segments)):
+        # a collection only takes an id at the root or right after another id
+        if segments[i - 1] in _ID_COLLECTIONS and (
+            i == 1 or segments[i - 2] in ("{id}", "browse")
+        ):
+            segments[i] = "{id}"
+    return "/".join(segments)
+
+
+class TokenBucket:
+    """
+    A token bucket that hands out tokens to the highest priority waiter first
+
+    Waiters with the same priority are served in the order they arrived.
+    The whole bucket can be paused, which is used when Spotify asks us
+    to back off with `Retry-After`.
+    """
+
+    def __init__(self, rate: float, capacity: int):
+        self.rate = rate
+        self.capacity = capacity
+        self._tokens = float(capacity)
+        self._last = time.monotonic()
+        self._paused_until = 0.0
+        # [priority, arrival] lists so a waiting entry can be reprioritised in place
+        self._waiters: List[List[int]] = []
+        self._counter = itertools.count()
+        self._cond: Optional[asyncio.Condition] = None
+
+    def pause(self, seconds: float) -> None:
+        self._paused_until = max(self._paused_until, time.monotonic() + seconds)
+
+    def _refill(self) -> float:
+        now = time.monotonic()
+        self._tokens = min(self.capacity, self._tokens + (now - self._last) * self.rate)
+        self._last = now
+        return now
+
+    def _wait_time(self, now: float) -> float:
+        if self._paused_until > now:
+            return self._paused_until - now
+        return max(0.0, (1 - self._tokens) / self.rate)
+
+    def reprioritise(self, entry: List[int], priority: int) -> None:
+        """Move a waiting entry to `priority` and wake the waiters to re-check the queue"""
+        if entry not in self._waiters:
+            return
+        entry[0] = int(priority)
+        heapq.heapify(self._waiters)
+        asyncio.ensure_future(self._wake())
+
+    async def _wake(self) -> None:
+        async with self._cond:
+            self._cond.notify_all()
+
+    async def acquire(
+        self, priority: Union[int, PriorityHandle] = RequestPriority.INTERACTIVE
+    ) -> None:
+        if self._cond is None:
+            # created lazily so it binds to the running loop
+            self._cond = asyncio.Condition()
+        handle = priority if isinstance(priority, PriorityHandle) else None
+        entry = [int(handle.priority if handle else priority), next(self._counter)]
+        async with self._cond:
+            heapq.heappush(self._waiters, entry)
+            if handle:
+                handle._waiting.append((self, entry))
+            try:
+                while True:
+                    now = self._refill()
+                    if self._waiters[0] is entry:
+                        wait = self._wait_time(now)
+                        if wait <= 0:
+                            heapq.heappop(self._waiters)
+                            self._tokens -= 1
+                            self._cond.notify_all()
+                            return
+                    else:
+                        wait = None
+                    try:
+                        await asyncio.wait_for(self._cond.wait(), wait)
+                    except asyncio.TimeoutError:
+                        pass
+            except BaseException:
+                if entry in self._waiters:
+                    self._waiters.remove(entry)
+                    heapq.heapify(self._waiters)
+                    self._cond.notify_all()
+                raise
+            finally:
+                if handle:
+                    handle._waiting.remove((self, entry))
+
+
+# upper bounds in milliseconds, anything slower lands in the last bucket
+LATENCY_BUCKETS = (50, 100, 250, 500, 1000, 2500, 5000)
+
+ERROR_NAMES = {
+    400: "BadRequest",
+    401: "Unauthorised",
+    403: "Forbidden",
+    404: "NotFound",
+    429: "TooManyRequests",
+}
+
+
+def error_name(status_code: int) -> Optional[str]:
+    if status_code < 400:
+        return None
+    if status_code >= 500:
+        return "ServerError"
+    return ERROR_NAMES.get(status_code, "HTTPError")
+
+
+class RequestStats:
+    """Call count, errors and a latency histogram for one endpoint or command"""
+
+    __slots__ = ("calls", "errors", "total_ms", "buckets")
+
+    def __init__(self):
+        self.calls = 0
+        self.errors: Counter = Counter()
+        self.total_ms = 0.0
+        self.buckets = [0] * (len(LATENCY_BUCKETS) + 1)
+
+    def record(self, elapsed_ms: float, error: Optional[str]) -> None:
+        self.calls += 1
+        self.total_ms += elapsed_ms
+        self.buckets[bisect.bisect_left(LATENCY_BUCKETS, elapsed_ms)] += 1
+        if error:
+            self.errors[error] += 1
+
+    @property
+    def mean_ms(self) -> float:
+        return self.total_ms / self.calls if self.calls else 0.0
+
+    def percentile_ms(self, pct: float) -> float:
+        """The upper bound of the bucket holding the `pct` percentile"""
+        target = self.calls * pct / 100
+        seen = 0
+        for bound, count in zip(LATENCY_BUCKETS, self.buckets):
+            seen += count
+            if seen >= target:
+                return bound
+        return float("inf")
+
+
+class SenderStats:
+    """
+    Request telemetry grouped by endpoint and by the command that made it
+
+    Every attempt is recorded, so a request that was retried after
+    a 429 counts once as `TooManyRequests` and once for the retry.
+    """
+
+    def __init__(self):
+        self.started = time.time()
+        self.endpoints: Dict[str, RequestStats] = {}
+        self.commands: Dict[str, RequestStats] = {}
+
+    def record(self, endpoint: str, elapsed_ms: float, error: Optional[str]) -> None:
+        command = _command.get() or "other"
+        for group, key in ((self.endpoints, endpoint), (self.commands, command)):
+            stats = group.get(key)
+            if stats is None:
+                stats = group[key] = RequestStats()
+            stats.record(elapsed_ms, error)
+
+    def clear(self) -> None:
+        self.started = time.time()
+        self.endpoints.clear()
+        self.commands.clear()
+
+
+class SpotifySender(tekore.ExtendingSender):
+    """
+    Schedules every request the cog makes to Spotify
+
+    - A global token bucket keeps the overall request rate under `rate`.
+    - Each endpoint may only have `endpoint_concurrency` requests in flight.
+    - 429 responses pause the bucket for `Retry-After` seconds and are retried,
+      5xx responses are retried with jittered exponential backoff.
+    - Interactive requests are given tokens before background ones.
+    - Every attempt is recorded in `stats`.
+
+    Any async tekore sender can be wrapped, which is how this is pointed
+    at a fake Spotify server for testing.
+    """
+
+    def __init__(
+        self,
+        sender: Optional[tekore.Sender] = None,
+        *,
+        rate: float = 10.0,
+        burst: int = 20,
+        endpoint_concurrency: int = 8,
+        endpoint_limits: Optional[Dict[str, int]] = None,
+        max_retries: int = 3,
+        stats: Optional[SenderStats] = None,
+    ):
+        super().__init__(sender or tekore.AsyncSender())
+        self.bucket = TokenBucket(rate, burst)
+        self.endpoint_concurrency = endpoint_concurrency
+        self.endpoint_limits = endpoint_limits or {"me/player": 4, "me/player/queue": 4}
+        self.max_retries = max_retries
+        self.stats = stats or SenderStats()
+        self._semaphores: Dict[str, asyncio.Semaphore] = {}
+
+    def __repr__(self):
+        return f"{type(self).__name__}(sender={self.sender!r})"
+
+    @property
+    def client(self):
+        return self.sender.client
+
+    def _semaphore(self, endpoint: str) -> asyncio.Semaphore:
+        semaphore = self._semaphores.get(endpoint)
+        if semaphore is None:
+            limit = self.endpoint_limits.get(endpoint, self.endpoint_concurrency)
+            semaphore = self._semaphores[endpoint] = asyncio.Semaphore(limit)
+        return semaphore
+
+    @staticmethod
+    def _retry_after(response: tekore.Response) -> float:
+        try:
+            return float(response.headers.get("Retry-After", 1))
+        except (TypeError, ValueError):
+            return 1.0
+
+    async def send(self, request: tekore.Request) -> tekore.Response:
+        endpoint = endpoint_name(request.url)
+        priority = _priority.get()
+        backoff = 0.5
+        async with self._semaphore(endpoint):
+            for attempt in range(self.max_retries + 1):
+                await self.bucket.acquire(priority)
+                start = time.perf_counter()
+                try:
+                    response = await self.sender.send(request)
+                except Exception as e:
+                    elapsed = (time.perf_counter() - start) * 1000
+                    self.stats.record(endpoint, elapsed, type(e).__name__)
+                    raise
+                elapsed = (time.perf_counter() - start) * 1000
+                self.stats.record(endpoint, elapsed, error_name(response.status_code))
+                retries_left = attempt < self.max_retries
+                if response.status_code == 429 and retries_left:
+                    retry_after = self._retry_after(response)
+                    log.debug("Rate limited on %s, retrying in %ss", endpoint, retry_after)
+                    self.bucket.pause(retry_after)
+                    await asyncio.sleep(retry_after + random.uniform(0, 0.5))
+                elif response.status_code >= 500 and retries_left:
+                    await asyncio.sleep(backoff + random.uniform(0, backoff))
+                    backoff *= 2
+                else:
+                    return response
@@ -23,31 +23,67 @@ SOFTWARE.
 """
 
 import asyncio
+import contextlib
+import csv
+import io
+import json
 import logging
+import random
 import re
+import tempfile
 import time
 from copy import copy
-from typing import Literal, Mapping, Optional, Tuple, Union
+from pathlib import Path
+from typing import (
+    AsyncIterator,
+    Awaitable,
+    Callable,
+    Dict,
+    Iterable,
+    List,
+    Literal,
+    Mapping,
+    Optional,
+    Set,
+    Tuple,
+    Union,
+)
 
 import discord
 import tekore
 from redbot.core import Config, commands
+from redbot.core.data_manager import cog_data_path
 from redbot.core.i18n import Translator, cog_i18n
-from redbot.core.utils.chat_formatting import humanize_list
+from redbot.core.utils.chat_formatting import box, humanize_list, humanize_timedelta, pagify
 from redbot.core.utils.predicates import ReactionPredicate
 from redbot.core.utils.menus import start_adding_reactions
+from tabulate import tabulate
 
+from .analytics import NUMPY, PlaylistStats
+from .cache import AudioFeaturesCache, TTLCache
+from .components import defer_interaction
 from .helpers import (
     SPOTIFY_RE,
+    GenreMatcher,
     InvalidEmoji,
+    MenuSettings,
     NotPlaying,
+    ParsedMessage,
     RecommendationsConverter,
     ScopeConverter,
     SearchTypes,
     SpotifyURIConverter,
+    bounded_gather,
+    achunks,
+    chunks,
+    iter_playlist_items,
+    parse_spotify_message,
     time_convert,
 )
+from .index import NameIndex
+from .library import LibraryIndex
 from .menus import (
+    MenuRouter,
     SpotifyAlbumPages,
     SpotifyArtistPages,
     SpotifyBaseMenu,
@@ -65,6 +101,17 @@ from .menus import (
     SpotifyUserMenu,
     emoji_handler,
 )
+from .metadata import MetadataStore
+from .poller import PlaybackPoller
+from .refresher import TokenRefresher
+from .sender import (
+    LATENCY_BUCKETS,
+    RequestPriority,
+    SenderStats,
+    SpotifySender,
+    request_priority,
+    set_request_command,
+)
 
 try:
     from .rpc import DashboardRPC_Spotify
@@ -76,6 +123,31 @@ except ImportError:
 log = logging.getLogger("red.trusty-cogs.spotify")
 _ = Translator("Spotify", __file__)
 
+GENRES_TTL = 7 * 24 * 60 * 60
+LIBRARY_SYNC_INTERVAL = 10 * 60
+# saved tracks kept in memory across every cached library, roughly 1 KiB each with the index
+LIBRARY_CACHE_TRACKS = 100_000
+
+REACTION_ACTIONS: Dict[str, Callable[..., Awaitable[bool]]] = {}
+
+
+def reaction_action(*actions: str):
+    """
+    Register a method as the handler for one or more `listen_for` actions
+
+    Handlers are called inside `user_spotify.token_as()` with the reacting user,
+    the Spotify client and the parsed message. They return whether
+    the bot should react to confirm the action.
+    """
+
+    def decorator(func):
+        for action in actions:
+            REACTION_ACTIONS[action] = func
+        return func
+
+    return decorator
+
+
 ActionConverter = commands.get_dict_converter(*emoji_handler.emojis.keys(), delims=[" ", ",", ";"])
 
 
@@ -91,9 +163,14 @@ class Spotify(commands.Cog):
     def __init__(self, bot):
         self.bot = bot
         self.config = Config.get_conf(self, identifier=218773382617890828)
-        self.config.register_user(token={}, listen_for={}, show_private=False)
+        self.config.register_user(
+            token={}, listen_for={}, show_private=False, library_index=False
+        )
         self.config.register_guild(
-            clear_reactions_after=True, delete_message_after=False, menu_timeout=120
+            clear_reactions_after=True,
+            delete_message_after=False,
+            menu_timeout=120,
+            use_buttons=False,
         )
         self.config.register_global(
             emojis={},
@@ -116,9 +193,12 @@ class Spotify(commands.Cog):
                 "ugc-image-upload",
             ],
             version="0.0.0",
+            genres=[],
+            genres_updated=0,
         )
 
         self._app_token = None
+        self._app_token_task: Optional[asyncio.Task] = None
         self._tokens: Tuple[str] = None
         self._spotify_client = None
         self._sender = None
@@ -126,9 +206,33 @@ class Spotify(commands.Cog):
         self._ready = asyncio.Event()
         self.bot.loop.create_task(self.initialize())
         self.HAS_TOKENS = False
-        self.current_menus = {}
+        self._menu_router = MenuRouter()
         self.user_menus = {}
         self.GENRES = []
+        self._genre_matcher = GenreMatcher([])
+        self._genres_updated = 0
+        self._user_tokens: Dict[int, tekore.Token] = {}
+        self._token_refreshes: Dict[int, asyncio.Task] = {}
+        self._token_saves: Set[asyncio.Task] = set()
+        self._playlist_cache = TTLCache(ttl=300)
+        self._playlist_index = TTLCache(ttl=300)
+        self._saved_tracks_index = TTLCache(ttl=300)
+        self._libraries = TTLCache(
+            ttl=3600, max_size=LIBRARY_CACHE_TRACKS, sizeof=lambda library: len(library) + 1
+        )
+        self._library_locks: Dict[int, Tuple[asyncio.Lock, int]] = {}
+        self._library_syncs: Dict[int, asyncio.Task] = {}
+        self._listen_for: Dict[int, Dict[str, str]] = {}
+        self._audio_features = AudioFeaturesCache()
+        self._metadata = MetadataStore(cog_data_path(self) / "metadata.sqlite3")
+        self._playback_poller = PlaybackPoller(self)
+        self._token_refresher = TokenRefresher(self)
+        self._search_cache = TTLCache(ttl=600, max_size=512)
+        self._user_markets = TTLCache(ttl=86400, max_size=10000)
+        self._reaction_messages = TTLCache(ttl=3600, max_size=512)
+        self._menu_settings: Dict[int, MenuSettings] = {}
+        self._button_guilds: Set[int] = set()
+        self._api_stats = SenderStats()
 
         # RPC
         self.dashboard_authed = []
@@ -151,22 +255,42 @@ class Spotify(commands.Cog):
 
     async def initialize(self):
         await self.migrate_settings()
+        all_users = await self.config.all_users()
+        self._listen_for = {
+            user_id: data["listen_for"]
+            for user_id, data in all_users.items()
+            if data.get("listen_for")
+        }
+
+        if not self.GENRES:
+            self.set_genres(await self.config.genres())
+            self._genres_updated = await self.config.genres_updated()
 
         tokens = await self.bot.get_shared_api_tokens("spotify")
         if not tokens:
             self._ready.set()
             return
         try:
-            self._sender = tekore.AsyncSender()
-            self._tokens = (
+            if self._sender is None:
+                # the sender holds no credentials so one client serves every set of tokens
+                self._sender = SpotifySender(stats=self._api_stats)
+            new_tokens = (
                 tokens.get("client_id"),
                 tokens.get("client_secret"),
                 tokens.get("redirect_uri", "https://localhost/"),
             )
-            self._credentials = tekore.Credentials(*self._tokens, sender=self._sender)
-            self._app_token = tekore.request_client_token(*self._tokens[:2])
+            credentials = tekore.Credentials(*new_tokens, sender=self._sender)
+            # only swap once the new credentials are known to work so a bad update
+            # leaves the current ones and their renewal task in place
+            app_token = await credentials.request_client_token()
+            self._tokens = new_tokens
+            self._credentials = credentials
+            self._app_token = app_token
             self._spotify_client = tekore.Spotify(self._app_token, sender=self._sender)
-            self.GENRES = await self._spotify_client.recommendation_genre_seeds()
+            if self._app_token_task:
+                self._app_token_task.cancel()
+            self._app_token_task = self.bot.loop.create_task(self.renew_app_token())
+            await self.get_genres()
         except Exception:
             log.exception("error starting the cog")
         emojis = await self.config.emojis()
@@ -177,6 +301,42 @@ class Spotify(commands.Cog):
                 pass
         self._ready.set()
 
+    def set_genres(self, genres: List[str]) -> None:
+        self.GENRES = genres
+        self._genre_matcher = GenreMatcher(genres)
+
+    async def get_genres(self, force: bool = False) -> List[str]:
+        """
+        Get the available recommendation genre seeds
+
+        These rarely change so they're saved and only refetched once a week
+        or when `force` is True.
+        """
+        if self.GENRES and not force and time.time() - self._genres_updated < GENRES_TTL:
+            return self.GENRES
+        genres = await self._spotify_client.recommendation_genre_seeds()
+        self.set_genres(genres)
+        self._genres_updated = int(time.time())
+        await self.config.genres.set(genres)
+        await self.config.genres_updated.set(self._genres_updated)
+        return genres
+
+    async def renew_app_token(self):
+        """
+        Keeps the app token fresh so app level calls never use an expired token
+        """
+        while True:
+            # renew 5 minutes before expiry, tokens normally last an hour
+            await asyncio.sleep(max(self._app_token.expires_in - 300, 30))
+            try:
+                self._app_token = await self._credentials.request_client_token()
+                self._spotify_client.token = self._app_token
+            except asyncio.CancelledError:
+                raise
+            except Exception:
+                # the old token is already close to expiry so this retries in 30 seconds
+                log.exception("Error renewing the Spotify app token")
+
     def format_help_for_context(self, ctx: commands.Context):
         """Thanks Sinbad!"""
         pre_processed = super().format_help_for_context(ctx)
@@ -187,13 +347,58 @@ class Spotify(commands.Cog):
         )
 
     async def cog_before_invoke(self, ctx: commands.Context) -> None:
+        set_request_command(ctx.command.qualified_name)
         await self._ready.wait()
+        if ctx.guild and ctx.guild.id not in self._menu_settings:
+            await self.load_menu_settings(ctx.guild)
+
+    async def load_menu_settings(self, guild: discord.Guild) -> MenuSettings:
+        data = await self.config.guild(guild).all()
+        settings = MenuSettings(
+            data["delete_message_after"], data["clear_reactions_after"], data["menu_timeout"]
+        )
+        self._menu_settings[guild.id] = settings
+        if data["use_buttons"]:
+            self._button_guilds.add(guild.id)
+        else:
+            self._button_guilds.discard(guild.id)
+        return settings
+
+    def menu_settings(self, guild: Optional[discord.Guild]) -> MenuSettings:
+        """
+        Get the menu settings for a guild without touching Config
+
+        Settings are loaded in `cog_before_invoke` so this is always
+        up to date inside commands. DMs and guilds that haven't been
+        loaded yet get the defaults.
+        """
+        if guild is None:
+            return MenuSettings()
+        return self._menu_settings.get(guild.id, MenuSettings())
+
+    def use_buttons(self, guild: Optional[discord.Guild]) -> bool:
+        """Whether menus in this guild are sent with buttons instead of reactions"""
+        return guild is not None and guild.id in self._button_guilds
 
     def cog_unload(self):
         if DASHBOARD:
             self.rpc_extension.unload()
-        if self._sender:
-            self.bot.loop.create_task(self._sender.client.aclose())
+        self._playback_poller.stop()
+        self._token_refresher.stop()
+        self._menu_router.stop()
+        self._metadata.close()
+        if self._app_token_task:
+            self._app_token_task.cancel()
+        for task in self._library_syncs.values():
+            task.cancel()
+        self.bot.loop.create_task(self._close(set(self._token_saves), self._sender))
+
+    async def _close(self, token_saves: Set[asyncio.Task], sender: Optional[SpotifySender]):
+        """Let any pending token saves finish before the http client goes away"""
+        if token_saves:
+            await asyncio.gather(*token_saves, return_exceptions=True)
+        if sender:
+            await sender.client.aclose()
 
     async def red_delete_data_for_user(
         self,
@@ -204,8 +409,26 @@ class Spotify(commands.Cog):
         """
         Method for finding users data inside the cog and deleting it.
         """
+        self.clear_user_cache(user_id)
+        self._listen_for.pop(user_id, None)
+        await self.delete_library(user_id)
         await self.config.user_from_id(user_id).clear()
 
+    def clear_user_cache(self, user_id: int) -> None:
+        """
+        Drop everything the cog holds in memory for a user
+        """
+        self._user_tokens.pop(user_id, None)
+        self._token_refresher.forget(user_id)
+        self._playlist_cache.pop(user_id)
+        self._playlist_index.pop(user_id)
+        self._saved_tracks_index.pop(user_id)
+        self._libraries.pop(user_id)
+        task = self._library_syncs.pop(user_id, None)
+        if task is not None:
+            task.cancel()
+        self._user_markets.pop(user_id)
+
     async def get_user_auth(self, ctx: commands.Context, user: Optional[discord.User] = None):
         """
         Handles getting and saving user authorization information
@@ -220,18 +443,23 @@ class Spotify(commands.Cog):
                 ).format(prefix=ctx.clean_prefix)
             )
             return
-        user_tokens = await self.config.user(author).token()
-        if user_tokens:
-            user_tokens["expires_in"] = user_tokens["expires_at"] - int(time.time())
-            user_token = tekore.Token(user_tokens, user_tokens["uses_pkce"])
+        user_token = self._user_tokens.get(author.id)
+        if user_token is None:
+            user_tokens = await self.config.user(author).token()
+            if user_tokens:
+                user_tokens["expires_in"] = user_tokens["expires_at"] - int(time.time())
+                user_token = tekore.Token(user_tokens, user_tokens["uses_pkce"])
+                self._user_tokens[author.id] = user_token
+        if user_token:
             if user_token.is_expiring:
                 try:
-                    user_token = await self._credentials.refresh(user_token)
+                    user_token = await self.refresh_user_token(author, user_token)
                 except tekore.BadRequest:
                     await ctx.send("Your refresh token has been revoked, clearing data.")
+                    self.clear_user_cache(author.id)
                     await self.config.user(author).token.clear()
                     return
-                await self.save_token(author, user_token)
+            self._token_refresher.touch(author.id, user_token)
             return user_token
         if author.id in self.temp_cache:
             await ctx.send(
@@ -309,240 +537,486 @@ class Spotify(commands.Cog):
         del self.temp_cache[author.id]
         return user_token
 
-    async def save_token(self, author: discord.User, user_token: tekore.Token):
-        async with self.config.user(author).token() as token:
-            token["access_token"] = user_token.access_token
-            token["refresh_token"] = user_token.refresh_token
-            token["expires_at"] = user_token.expires_at
-            token["scope"] = str(user_token.scope)
-            token["uses_pkce"] = user_token.uses_pkce
-            token["token_type"] = user_token.token_type
+    async def refresh_user_token(
+        self, author: discord.abc.User, user_token: tekore.Token
+    ) -> tekore.Token:
+        """
+        Refresh a users token making sure only one refresh per user is in flight
+
+        Any other callers waiting on the same user will receive the same refreshed token.
+        """
+        task = self._token_refreshes.get(author.id)
+        if task is None:
+            task = asyncio.ensure_future(self._refresh_user_token(author, user_token))
+            self._token_refreshes[author.id] = task
+            task.add_done_callback(lambda t: self._token_refreshes.pop(author.id, None))
+        return await asyncio.shield(task)
+
+    async def _refresh_user_token(
+        self, author: discord.abc.User, user_token: tekore.Token
+    ) -> tekore.Token:
+        user_token = await self._credentials.refresh(user_token)
+        await self.save_token(author, user_token)
+        return user_token
+
+    async def save_token(self, author: discord.abc.User, user_token: tekore.Token):
+        """
+        Update the cached token and persist it to config in the background
+        """
+        self._user_tokens[author.id] = user_token
+        task = self.bot.loop.create_task(self._persist_token(author.id, user_token))
+        self._token_saves.add(task)
+        task.add_done_callback(self._token_saves.discard)
+
+    async def _persist_token(self, user_id: int, user_token: tekore.Token):
+        if self._user_tokens.get(user_id) is not user_token:
+            # a newer token has been saved since this was scheduled
+            return
+        try:
+            await self.config.user_from_id(user_id).token.set(
+                {
+                    "access_token": user_token.access_token,
+                    "refresh_token": user_token.refresh_token,
+                    "expires_at": user_token.expires_at,
+                    "scope": str(user_token.scope),
+                    "uses_pkce": user_token.uses_pkce,
+                    "token_type": user_token.token_type,
+                }
+            )
+        except Exception:
+            log.exception("Error saving token for %s", user_id)
+
+    async def get_user_playlists(
+        self, author: discord.abc.User, user_spotify: tekore.Spotify
+    ) -> List[tekore.model.SimplePlaylist]:
+        """
+        Get all of a users followed playlists
+
+        This must be called inside `user_spotify.token_as()`.
+        Once the total is known the remaining pages are fetched concurrently
+        and the result is cached until it expires or the user modifies a playlist.
+        """
+        playlists = self._playlist_cache.get(author.id)
+        if playlists is not None:
+            return playlists
+        cur = await user_spotify.followed_playlists(limit=50)
+        playlists = list(cur.items)
+        if cur.total > len(playlists):
+            pages = await bounded_gather(
+                user_spotify.followed_playlists(limit=50, offset=offset)
+                for offset in range(len(playlists), cur.total, 50)
+            )
+            for page in pages:
+                playlists.extend(page.items)
+        self._playlist_cache.set(author.id, playlists)
+        return playlists
+
+    def invalidate_user_playlists(self, author: discord.abc.User) -> None:
+        self._playlist_cache.pop(author.id)
+        self._playlist_index.pop(author.id)
+
+    async def get_playlist_index(
+        self, author: discord.abc.User, user_spotify: tekore.Spotify
+    ) -> NameIndex:
+        """
+        Get a name index of a users followed playlists
+
+        The index is rebuilt only when the cached playlists change.
+        This must be called inside `user_spotify.token_as()`.
+        """
+        playlists = await self.get_user_playlists(author, user_spotify)
+        cached = self._playlist_index.get(author.id)
+        if cached is not None and cached[0] is playlists:
+            return cached[1]
+        index = NameIndex.from_items((p, p.name, ()) for p in playlists)
+        self._playlist_index.set(author.id, (playlists, index))
+        return index
+
+    async def get_saved_tracks_index(
+        self, author: discord.abc.User, user_spotify: tekore.Spotify
+    ) -> NameIndex:
+        """
+        Get a name and artist index of a users most recently saved tracks
+
+        This must be called inside `user_spotify.token_as()`.
+        """
+        index = self._saved_tracks_index.get(author.id)
+        if index is not None:
+            return index
+        saved_tracks = await user_spotify.saved_tracks(limit=50)
+        index = NameIndex.from_items(
+            (t.track, t.track.name, [a.name for a in t.track.artists]) for t in saved_tracks.items
+        )
+        self._saved_tracks_index.set(author.id, index)
+        return index
+
+    def library_path(self, user_id: int) -> Path:
+        return cog_data_path(self) / "library" / f"{user_id}.json"
+
+    async def get_library(
+        self, author: discord.abc.User, user_spotify: tekore.Spotify, force: bool = False
+    ) -> Optional[LibraryIndex]:
+        """
+        Get the local index of a users saved tracks if they've enabled it
+
+        The index is loaded from disk the first time it's needed. Once it
+        is more than `LIBRARY_SYNC_INTERVAL` seconds old the current copy is
+        returned and synced in the background, only a library that has never
+        been synced or `force` makes the caller wait for the sync.
+        This must be called inside `user_spotify.token_as()`.
+        """
+        if not await self.config.user(author).library_index():
+            return None
+        async with self.library_lock(author.id):
+            library = self._libraries.get(author.id)
+            if library is None:
+                path = self.library_path(author.id)
+                library = await self.bot.loop.run_in_executor(None, self._load_library, path)
+                self._libraries.set(author.id, library)
+            if force or not library.synced_at:
+                await self._sync_library(author.id, library, user_spotify)
+            elif library.is_stale(LIBRARY_SYNC_INTERVAL) and author.id not in self._library_syncs:
+                # the task inherits the users token from `token_as`
+                with request_priority(RequestPriority.BACKGROUND):
+                    self._library_syncs[author.id] = asyncio.ensure_future(
+                        self._refresh_library(author.id, library, user_spotify)
+                    )
+        return library
+
+    @staticmethod
+    def _load_library(path: Path) -> LibraryIndex:
+        library = LibraryIndex.load(path) or LibraryIndex()
+        library.build_index()
+        return library
+
+    async def _sync_library(
+        self, user_id: int, library: LibraryIndex, user_spotify: tekore.Spotify
+    ) -> None:
+        """Sync a library and reindex it, the caller must hold the users library lock"""
+        new = await library.sync(user_spotify)
+        log.debug("Synced %s new saved tracks for %s", new, user_id)
+        await self.bot.loop.run_in_executor(None, library.build_index)
+        await self.bot.loop.run_in_executor(None, library.save, self.library_path(user_id))
+        if self._libraries.get(user_id) is library:
+            # store it again so the cache accounts for its new size
+            self._libraries.set(user_id, library)
+
+    async def _refresh_library(
+        self, user_id: int, library: LibraryIndex, user_spotify: tekore.Spotify
+    ) -> None:
+        try:
+            async with self.library_lock(user_id):
+                await self._sync_library(user_id, library, user_spotify)
+        except Exception:
+            log.exception("Error syncing saved tracks for %s", user_id)
+        finally:
+            if self._library_syncs.get(user_id) is asyncio.current_task():
+                del self._library_syncs[user_id]
+
+    @contextlib.asynccontextmanager
+    async def library_lock(self, user_id: int) -> AsyncIterator[None]:
+        """Hold a users library lock, dropping it once nobody else is waiting on it"""
+        lock, users = self._library_locks.get(user_id, (None, 0))
+        if lock is None:
+            lock = asyncio.Lock()
+        self._library_locks[user_id] = (lock, users + 1)
+        try:
+            async with lock:
+                yield
+        finally:
+            lock, users = self._library_locks[user_id]
+            if users <= 1:
+                del self._library_locks[user_id]
+            else:
+                self._library_locks[user_id] = (lock, users - 1)
+
+    async def delete_library(self, user_id: int) -> None:
+        self._libraries.pop(user_id)
+        task = self._library_syncs.pop(user_id, None)
+        if task is not None:
+            task.cancel()
+        async with self.library_lock(user_id):
+            try:
+                self.library_path(user_id).unlink()
+            except FileNotFoundError:
+                pass
+
+    async def get_user_market(self, author: discord.abc.User, user_spotify: tekore.Spotify) -> str:
+        """
+        Get the country a users account belongs to for searching
+
+        This must be called inside `user_spotify.token_as()`.
+        """
+
+        async def fetch() -> str:
+            try:
+                user = await user_spotify.current_user()
+            except tekore.Forbidden:
+                # the bot owner has removed the user-read-private scope
+                return ""
+            return user.country or ""
+
+        return await self._user_markets.get_or_fetch(author.id, fetch)
+
+    async def search_cached(
+        self,
+        author: discord.abc.User,
+        user_spotify: tekore.Spotify,
+        query: str,
+        search_type: str,
+    ) -> list:
+        """
+        Search Spotify sharing results with anyone else searching the same market
+
+        Identical searches running at the same time only make one request.
+        This must be called inside `user_spotify.token_as()`.
+        """
+        market = await self.get_user_market(author, user_spotify)
+        # without a country the results can only be shared with the same user
+        key = (" ".join(query.casefold().split()), search_type, market or author.id)
+
+        async def fetch() -> list:
+            search = await user_spotify.search(
+                query, (search_type,), market or "from_token", limit=50
+            )
+            return search[0].items
+
+        return await self._search_cache.get_or_fetch(key, fetch)
+
+    @staticmethod
+    def _playlist_not_found(name: str, index: NameIndex) -> str:
+        msg = _("I could not find a playlist matching {name}.").format(name=name)
+        suggestions = index.search(name, limit=3)
+        if suggestions:
+            msg += "\n" + _("Did you mean: {playlists}").format(
+                playlists=", ".join(f"`{p.name}`" for p in suggestions)
+            )
+        return msg
 
     @commands.Cog.listener()
     async def on_raw_reaction_add(self, payload: discord.RawReactionActionEvent):
         """
         Handles listening for reactions and parsing
         """
-        if payload.message_id in self.current_menus:
-            if self.current_menus[payload.message_id] == payload.user_id:
-                log.debug("Menu reaction from the same user ignoring")
-                return
-        listen_for = await self.config.user_from_id(payload.user_id).listen_for()
+        # Everything before the first await here must stay synchronous
+        # since this runs for every reaction the bot can see
+        menu = self._menu_router.dispatch(payload)
+        if menu is not None and menu._author_id == payload.user_id:
+            log.debug("Menu reaction from the same user ignoring")
+            return
+        listen_for = self._listen_for.get(payload.user_id)
         if not listen_for:
             return
+        action = listen_for.get(str(payload.emoji))
+        if action is None:
+            return
+        if payload.guild_id is None:
+            return
         guild = self.bot.get_guild(payload.guild_id)
         if not guild:
             return
         if await self.bot.cog_disabled_in_guild(self, guild):
             return
 
+        user = self.bot.get_user(payload.user_id)
+        if not user:
+            return
         channel = guild.get_channel(payload.channel_id)
         try:
-            message = await channel.fetch_message(payload.message_id)
+            message, parsed = await self.get_reaction_message(channel, payload.message_id)
         except Exception:
             return
 
-        content = message.content
-        if message.embeds:
-            em_dict = message.embeds[0].to_dict()
-            content += " ".join(v for k, v in em_dict.items() if k in ["title", "description"])
-            if "title" in em_dict:
-                if "url" in em_dict["title"]:
-                    content += " " + em_dict["title"]["url"]
-            if "fields" in em_dict:
-                for field in em_dict["fields"]:
-                    content += " " + field["name"] + " " + field["value"]
-            log.debug(content)
-        content = content.replace("🧑‍🎨", ":artist:")
-        # because discord will replace this in URI's automatically 🙄
-        song_data = SPOTIFY_RE.finditer(content)
-        tracks = []
-        albums = []
-        playlists = []
-        if song_data:
-            new_uri = ""
-            for match in song_data:
-                new_uri = f"spotify:{match.group(2)}:{match.group(3)}"
-                if match.group(2) == "track":
-                    tracks.append(match.group(3))
-                if match.group(2) == "album":
-                    albums.append(match.group(3))
-                if match.group(2) == "playlist":
-                    playlists.append(match.group(3))
+        set_request_command(f"reaction {action}")
         ctx = await self.bot.get_context(message)
-        user = self.bot.get_user(payload.user_id)
-        if not user:
-            return
-        if str(payload.emoji) not in listen_for:
-            return
         user_token = await self.get_user_auth(ctx, user)
         if not user_token:
             return
+        handler = REACTION_ACTIONS.get(action)
+        if handler is None:
+            return
         user_spotify = tekore.Spotify(sender=self._sender)
-        action = listen_for[str(payload.emoji)]
-        if action == "play" or action == "playpause":
-            # play the song if it exists
-            try:
-                with user_spotify.token_as(user_token):
-                    if tracks:
-                        await user_spotify.playback_start_tracks(tracks)
-                        await ctx.react_quietly(payload.emoji)
-                        return
-                    elif new_uri:
-                        await user_spotify.playback_start_context(new_uri)
-                        await ctx.react_quietly(payload.emoji)
-                        return
-                    elif message.embeds:
-                        em = message.embeds[0]
-                        query = None
-                        if em.description:
-                            look = f"{em.title if em.title else ''}-{em.description}"
-                            find = re.search(r"\[(.+)\]", look)
-                            if find:
-                                query = find.group(1)
-                        else:
-                            query = em.title if em.title else ""
-                        if not query or query == "-":
-                            return
-                        search = await user_spotify.search(
-                            query, ("track",), "from_token", limit=50
-                        )
-                        # log.debug(search)
-                        tracks = search[0].items
-                        if tracks:
-                            await user_spotify.playback_start_tracks([t.id for t in tracks])
-                            await ctx.react_quietly(payload.emoji)
-            except Exception:
-                log.exception("Error on reaction add play")
-                pass
-        if action == "queue":
-            # append a track to the queue
-            try:
-                with user_spotify.token_as(user_token):
-                    if tracks:
-                        for track in tracks:
-                            await user_spotify.playback_queue_add(f"spotify:track:{track}")
-                        await ctx.react_quietly(payload.emoji)
-                        return
-                    elif message.embeds:
-                        em = message.embeds[0]
-                        query = None
-                        if em.description:
-                            look = f"{em.title if em.title else ''}-{em.description}"
-                            find = re.search(r"\[(.+)\]", look)
-                            if find:
-                                query = find.group(1)
-                        else:
-                            query = em.title if em.title else ""
-                        if not query or query == "-":
-                            return
-                        search = await user_spotify.search(
-                            query, ("track",), "from_token", limit=50
-                        )
-                        # log.debug(search)
-                        tracks = search[0].items
-                        if tracks:
-                            await user_spotify.playback_start_tracks([t.id for t in tracks])
-                            await ctx.react_quietly(payload.emoji)
-            except Exception:
-                log.exception("Error on reaction add play")
-                pass
-        if action == "like":
-            try:
-                with user_spotify.token_as(user_token):
-                    if tracks:
-                        await user_spotify.saved_tracks_add(tracks)
-                    if albums:
-                        await user_spotify.saved_albums_add(albums)
-                    if playlists:
-                        for playlist in playlists:
-                            await user_spotify.playlists_add(playlist)
-                await ctx.react_quietly(payload.emoji)
-            except Exception:
-                pass
-        if action == "pause":
-            try:
-                with user_spotify.token_as(user_token):
-                    cur = await user_spotify.playback()
-                    if cur.is_playing:
-                        await user_spotify.playback_pause()
-                    await ctx.react_quietly(payload.emoji)
-            except Exception:
-                pass
-        if action == "repeat":
-            try:
-                with user_spotify.token_as(user_token):
-                    cur = await user_spotify.playback()
-                    if cur.repeat_state == "off":
-                        state = "context"
-                    if cur.repeat_state == "context":
-                        state = "off"
-                    await user_spotify.playback_repeat(state)
-                await ctx.react_quietly(payload.emoji)
-            except Exception:
-                pass
-        if action == "repeatone":
-            try:
-                with user_spotify.token_as(user_token):
-                    cur = await user_spotify.playback()
-                    if cur.repeat_state == "off":
-                        state = "track"
-                    if cur.repeat_state == "track":
-                        state = "off"
-                    await user_spotify.playback_repeat(state)
-                await ctx.react_quietly(payload.emoji)
-            except Exception:
-                pass
-        if action == "shuffle":
-            try:
-                with user_spotify.token_as(self.user_token):
-                    cur = await user_spotify.playback()
-                    if not cur:
-                        return
-                    await user_spotify.playback_shuffle(not cur.shuffle_state)
-                await ctx.react_quietly(payload.emoji)
-            except Exception:
-                pass
-        if action == "next":
-            try:
-                with user_spotify.token_as(user_token):
-                    await user_spotify.playback_next()
-                await ctx.react_quietly(payload.emoji)
-            except Exception:
-                pass
-        if action == "previous":
-            try:
-                with user_spotify.token_as(user_token):
-                    await user_spotify.playback_previous()
-                await ctx.react_quietly(payload.emoji)
-            except Exception:
-                pass
-        if action == "volume_down":
-            try:
-                with user_spotify.token_as(user_token):
-                    cur = await user_spotify.playback()
-                    volume = cur.device.volume_percent - 10
-                    await user_spotify.playback_volume(volume)
-                await ctx.react_quietly(payload.emoji)
-            except Exception:
-                pass
-        if action == "volume_up":
-            try:
-                with user_spotify.token_as(user_token):
-                    cur = await user_spotify.playback()
-                    volume = cur.device.volume_percent + 10
-                    await user_spotify.playback_volume(volume)
-                await ctx.react_quietly(payload.emoji)
-            except Exception:
-                pass
-        if action == "volume_mute":
-            try:
-                with user_spotify.token_as(user_token):
-                    cur = await user_spotify.playback()
-                    await user_spotify.playback_volume(0)
-                await ctx.react_quietly(payload.emoji)
-            except Exception:
-                pass
+        try:
+            with user_spotify.token_as(user_token):
+                done = await handler(self, user, user_spotify, parsed)
+        except Exception:
+            log.exception("Error on reaction %s", action)
+            return
+        if done:
+            await ctx.react_quietly(payload.emoji)
+
+    @commands.Cog.listener()
+    async def on_raw_reaction_remove(self, payload: discord.RawReactionActionEvent):
+        self._menu_router.dispatch(payload)
+
+    @commands.Cog.listener()
+    async def on_socket_response(self, msg: dict):
+        if msg.get("t") != "INTERACTION_CREATE":
+            return
+        data = msg["d"]
+        # 3 is a message component, anything else isn't for our menus
+        if data.get("type") != 3:
+            return
+        if self._menu_router.dispatch_interaction(data) is not None:
+            await defer_interaction(self.bot, data)
+
+    async def get_reaction_message(
+        self, channel: discord.abc.Messageable, message_id: int
+    ) -> Tuple[discord.Message, ParsedMessage]:
+        """
+        Get a reacted to message along with the spotify links parsed from it
+
+        Messages still in the bots message cache are used as is, anything
+        else is fetched once. Either way the result is kept until the message
+        is edited or deleted so more reactions on the same message don't
+        need another fetch or parse.
+        """
+
+        async def fetch() -> Tuple[discord.Message, ParsedMessage]:
+            message = self.bot._connection._get_message(message_id)
+            if message is None:
+                message = await channel.fetch_message(message_id)
+            return message, parse_spotify_message(message)
+
+        return await self._reaction_messages.get_or_fetch(message_id, fetch)
+
+    @commands.Cog.listener()
+    async def on_raw_message_edit(self, payload: discord.RawMessageUpdateEvent):
+        self._reaction_messages.pop(payload.message_id)
+
+    @commands.Cog.listener()
+    async def on_raw_message_delete(self, payload: discord.RawMessageDeleteEvent):
+        self._reaction_messages.pop(payload.message_id)
+
+    @commands.Cog.listener()
+    async def on_raw_bulk_message_delete(self, payload: discord.RawBulkMessageDeleteEvent):
+        for message_id in payload.message_ids:
+            self._reaction_messages.pop(message_id)
+
+    @reaction_action("play", "playpause")
+    async def _reaction_play(
+        self, user: discord.User, user_spotify: tekore.Spotify, parsed: ParsedMessage
+    ) -> bool:
+        if parsed.tracks:
+            await user_spotify.playback_start_tracks(parsed.tracks)
+            return True
+        if parsed.last_uri:
+            await user_spotify.playback_start_context(parsed.last_uri)
+            return True
+        if parsed.query:
+            tracks = await self.search_cached(user, user_spotify, parsed.query, "track")
+            if tracks:
+                await user_spotify.playback_start_tracks([t.id for t in tracks])
+                return True
+        return False
+
+    @reaction_action("queue")
+    async def _reaction_queue(
+        self, user: discord.User, user_spotify: tekore.Spotify, parsed: ParsedMessage
+    ) -> bool:
+        uris = [f"spotify:track:{track}" for track in parsed.tracks]
+        if not uris and parsed.query:
+            tracks = await self.search_cached(user, user_spotify, parsed.query, "track")
+            uris = [t.uri for t in tracks[:1]]
+        if not uris:
+            return False
+        # spotify appends in the order requests arrive so these are sent
+        # one at a time to keep the order of the links in the message
+        for uri in uris:
+            await user_spotify.playback_queue_add(uri)
+        return True
+
+    @reaction_action("like")
+    async def _reaction_like(
+        self, user: discord.User, user_spotify: tekore.Spotify, parsed: ParsedMessage
+    ) -> bool:
+        requests = [user_spotify.saved_tracks_add(c) for c in chunks(parsed.tracks, 50)]
+        requests += [user_spotify.saved_albums_add(c) for c in chunks(parsed.albums, 50)]
+        requests += [user_spotify.playlist_follow(p) for p in parsed.playlists]
+        await bounded_gather(requests)
+        if parsed.playlists:
+            self.invalidate_user_playlists(user)
+        return True
+
+    @reaction_action("pause")
+    async def _reaction_pause(
+        self, user: discord.User, user_spotify: tekore.Spotify, parsed: ParsedMessage
+    ) -> bool:
+        cur = await user_spotify.playback()
+        if cur and cur.is_playing:
+            await user_spotify.playback_pause()
+        return True
+
+    @reaction_action("repeat")
+    async def _reaction_repeat(
+        self, user: discord.User, user_spotify: tekore.Spotify, parsed: ParsedMessage
+    ) -> bool:
+        cur = await user_spotify.playback()
+        if not cur:
+            return False
+        await user_spotify.playback_repeat("context" if cur.repeat_state == "off" else "off")
+        return True
+
+    @reaction_action("repeatone")
+    async def _reaction_repeat_one(
+        self, user: discord.User, user_spotify: tekore.Spotify, parsed: ParsedMessage
+    ) -> bool:
+        cur = await user_spotify.playback()
+        if not cur:
+            return False
+        await user_spotify.playback_repeat("track" if cur.repeat_state == "off" else "off")
+        return True
+
+    @reaction_action("shuffle")
+    async def _reaction_shuffle(
+        self, user: discord.User, user_spotify: tekore.Spotify, parsed: ParsedMessage
+    ) -> bool:
+        cur = await user_spotify.playback()
+        if not cur:
+            return False
+        await user_spotify.playback_shuffle(not cur.shuffle_state)
+        return True
+
+    @reaction_action("next")
+    async def _reaction_next(
+        self, user: discord.User, user_spotify: tekore.Spotify, parsed: ParsedMessage
+    ) -> bool:
+        await user_spotify.playback_next()
+        return True
+
+    @reaction_action("previous")
+    async def _reaction_previous(
+        self, user: discord.User, user_spotify: tekore.Spotify, parsed: ParsedMessage
+    ) -> bool:
+        await user_spotify.playback_previous()
+        return True
+
+    @reaction_action("volume_down")
+    async def _reaction_volume_down(
+        self, user: discord.User, user_spotify: tekore.Spotify, parsed: ParsedMessage
+    ) -> bool:
+        cur = await user_spotify.playback()
+        if not cur:
+            return False
+        await user_spotify.playback_volume(max(cur.device.volume_percent - 10, 0))
+        return True
+
+    @reaction_action("volume_up")
+    async def _reaction_volume_up(
+        self, user: discord.User, user_spotify: tekore.Spotify, parsed: ParsedMessage
+    ) -> bool:
+        cur = await user_spotify.playback()
+        if not cur:
+            return False
+        await user_spotify.playback_volume(min(cur.device.volume_percent + 10, 100))
+        return True
+
+    @reaction_action("volume_mute")
+    async def _reaction_volume_mute(
+        self, user: discord.User, user_spotify: tekore.Spotify, parsed: ParsedMessage
+    ) -> bool:
+        await user_spotify.playback_volume(0)
+        return True
 
     @commands.Cog.listener()
     async def on_red_api_tokens_update(
@@ -579,6 +1053,13 @@ class Spotify(commands.Cog):
         """
         pass
 
+    @spotify_com.group(name="library")
+    async def spotify_library(self, ctx: commands.Context):
+        """
+        Search your saved tracks without waiting on Spotify
+        """
+        pass
+
     @spotify_set.command(name="listen")
     async def set_reaction_listen(self, ctx: commands.Context, *, listen_for: ActionConverter):
         """
@@ -620,6 +1101,7 @@ class Spotify(commands.Cog):
                         added[str(emoji)] = action
                     except discord.errors.HTTPException:
                         pass
+            self._listen_for[ctx.author.id] = dict(current)
         msg = _("I will now listen for the following emojis from you:\n")
         for emoji, action in added.items():
             msg += f"{emoji} -> {action}\n"
@@ -662,6 +1144,10 @@ class Spotify(commands.Cog):
                     if to_rem:
                         for emoji in to_rem:
                             del current[emoji]
+            if current:
+                self._listen_for[ctx.author.id] = dict(current)
+            else:
+                self._listen_for.pop(ctx.author.id, None)
 
         if not removed:
             return await ctx.send(_("None of the listed events were being listened for."))
@@ -676,9 +1162,7 @@ class Spotify(commands.Cog):
         """
         Show settings for menu timeouts
         """
-        delete_after = await self.config.guild(ctx.guild).delete_message_after()
-        clear_after = await self.config.guild(ctx.guild).clear_reactions_after()
-        timeout = await self.config.guild(ctx.guild).menu_timeout()
+        delete_after, clear_after, timeout = self.menu_settings(ctx.guild)
         msg = _(
             "Delete After: {delete_after}\nClear After: {clear_after}\nTimeout: {timeout}"
         ).format(delete_after=delete_after, clear_after=clear_after, timeout=timeout)
@@ -708,6 +1192,7 @@ class Spotify(commands.Cog):
         Note: the bot requires manage messages for this to work
         """
         await self.config.guild(ctx.guild).clear_reactions_after.set(clear_after)
+        self._menu_settings.pop(ctx.guild.id, None)
         if clear_after:
             msg = _("I will now clear reactions after the menu has timed out.\n")
         else:
@@ -726,6 +1211,7 @@ class Spotify(commands.Cog):
 
         """
         await self.config.guild(ctx.guild).delete_message_after.set(delete_after)
+        self._menu_settings.pop(ctx.guild.id, None)
         if delete_after:
             msg = _("I will now delete the menu message after timeout.\n")
         else:
@@ -744,9 +1230,29 @@ class Spotify(commands.Cog):
         """
         timeout = max(min(600, timeout), 30)
         await self.config.guild(ctx.guild).menu_timeout.set(timeout)
+        self._menu_settings.pop(ctx.guild.id, None)
         msg = _("I will timeout menus after {time} seconds.\n").format(time=timeout)
         await ctx.send(msg)
 
+    @spotify_set.command(name="buttons")
+    @commands.mod_or_permissions(manage_messages=True)
+    async def guild_use_buttons(self, ctx: commands.Context, use_buttons: bool):
+        """
+        Set whether menus use buttons instead of reactions
+
+        Buttons are sent along with the menu so it can be used straight
+        away instead of waiting for every reaction to be added.
+        """
+        await self.config.guild(ctx.guild).use_buttons.set(use_buttons)
+        self._menu_settings.pop(ctx.guild.id, None)
+        if use_buttons:
+            self._button_guilds.add(ctx.guild.id)
+            msg = _("Menus will now use buttons.\n")
+        else:
+            self._button_guilds.discard(ctx.guild.id)
+            msg = _("Menus will now use reactions.\n")
+        await ctx.send(msg)
+
     @spotify_set.command(name="resetemojis", aliases=["resetemoji"])
     @commands.is_owner()
     async def spotify_reset_emoji(self, ctx: commands.Context):
@@ -859,6 +1365,53 @@ class Spotify(commands.Cog):
         scope = humanize_list(await self.config.scopes())
         await ctx.maybe_send_embed(_("Current scopes:\n{scopes}").format(scopes=scope))
 
+    @spotify_set.command(name="stats")
+    @commands.is_owner()
+    async def spotify_api_stats(self, ctx: commands.Context, reset: bool = False):
+        """
+        Show how the cog has been using the Spotify API
+
+        Lists call counts, errors and latency per endpoint and per command
+        since the cog loaded along with how many menus are open.
+        `[reset=False]` clears the stats after showing them.
+        """
+        stats = self._api_stats
+        open_menus = _("Open menus: {open} (peak {peak})\n").format(
+            open=len(self._menu_router), peak=self._menu_router.peak
+        )
+        if not stats.endpoints:
+            msg = _("No requests have been made to Spotify yet.")
+            return await ctx.send(box(open_menus) + msg)
+        msg = open_menus + _("Spotify API usage for the last {time}\n").format(
+            time=humanize_timedelta(seconds=max(1, int(time.time() - stats.started)))
+        )
+
+        def bucket(value: float) -> str:
+            if value == float("inf"):
+                return f">{LATENCY_BUCKETS[-1]}ms"
+            return f"<{value:.0f}ms"
+
+        headers = [_("Calls"), _("Errors"), _("Mean"), _("p50"), _("p95")]
+        for title, group in ((_("Endpoint"), stats.endpoints), (_("Command"), stats.commands)):
+            rows = []
+            for name, data in sorted(group.items(), key=lambda i: i[1].calls, reverse=True):
+                errors = ", ".join(f"{e} {c}" for e, c in data.errors.most_common())
+                rows.append(
+                    [
+                        name,
+                        data.calls,
+                        errors or "-",
+                        f"{data.mean_ms:.0f}ms",
+                        bucket(data.percentile_ms(50)),
+                        bucket(data.percentile_ms(95)),
+                    ]
+                )
+            msg += "\n" + tabulate(rows, headers=[title, *headers]) + "\n"
+        for page in pagify(msg, page_length=1980):
+            await ctx.send(box(page))
+        if reset:
+            stats.clear()
+
     @spotify_set.command(name="creds")
     @commands.is_owner()
     async def spotify_api_credential_set(self, ctx: commands.Context):
@@ -886,6 +1439,9 @@ class Spotify(commands.Cog):
         """
         Forget all your spotify settings and credentials on the bot
         """
+        self.clear_user_cache(ctx.author.id)
+        self._listen_for.pop(ctx.author.id, None)
+        await self.delete_library(ctx.author.id)
         await self.config.user(ctx.author).clear()
         if ctx.author.id in self.dashboard_authed:
             self.dashboard_authed.remove(ctx.author.id)
@@ -975,13 +1531,12 @@ class Spotify(commands.Cog):
                     ][0]
                     user_spotify = tekore.Spotify(sender=self._sender)
                     with user_spotify.token_as(user_token):
-                        track = await user_spotify.track(activity.track_id)
-            if ctx.guild:
-                delete_after = await self.config.guild(ctx.guild).delete_message_after()
-                clear_after = await self.config.guild(ctx.guild).clear_reactions_after()
-                timeout = await self.config.guild(ctx.guild).menu_timeout()
-            else:
-                delete_after, clear_after, timeout = False, True, 120
+                        track = await self._metadata.get(
+                            user_spotify, "track", activity.track_id
+                        )
+                    if track is None:
+                        return await ctx.send(_("I could not find that track on Spotify."))
+            delete_after, clear_after, timeout = self.menu_settings(ctx.guild)
         try:
             if member is None:
                 page_source = SpotifyPages(
@@ -1082,20 +1637,14 @@ class Spotify(commands.Cog):
                 return await ctx.send(_("You need to authorize me to interact with spotify."))
             user_spotify = tekore.Spotify(sender=self._sender)
             with user_spotify.token_as(user_token):
-                search = await user_spotify.search(query, (search_type,), "from_token", limit=50)
-                items = search[0].items
-            if not search[0].items:
+                items = await self.search_cached(ctx.author, user_spotify, query, search_type)
+            if not items:
                 return await ctx.send(
                     _("No {search_type} could be found matching that query.").format(
                         search_type=search_type
                     )
                 )
-            if ctx.guild:
-                delete_after = await self.config.guild(ctx.guild).delete_message_after()
-                clear_after = await self.config.guild(ctx.guild).clear_reactions_after()
-                timeout = await self.config.guild(ctx.guild).menu_timeout()
-            else:
-                delete_after, clear_after, timeout = False, True, 120
+            delete_after, clear_after, timeout = self.menu_settings(ctx.guild)
         await SpotifySearchMenu(
             source=search_types[search_type](items=items, detailed=detailed),
             delete_message_after=delete_after,
@@ -1113,7 +1662,7 @@ class Spotify(commands.Cog):
         Display all available genres for the recommendations
         """
         try:
-            self.GENRES = await self._spotify_client.recommendation_genre_seeds()
+            await self.get_genres()
         except Exception:
             log.exception("Error grabbing genres.")
             return await ctx.send(
@@ -1179,12 +1728,7 @@ class Spotify(commands.Cog):
                 items = search.tracks
             if not items:
                 return await ctx.send(_("No recommendations could be found with that query."))
-            if ctx.guild:
-                delete_after = await self.config.guild(ctx.guild).delete_message_after()
-                clear_after = await self.config.guild(ctx.guild).clear_reactions_after()
-                timeout = await self.config.guild(ctx.guild).menu_timeout()
-            else:
-                delete_after, clear_after, timeout = False, True, 120
+            delete_after, clear_after, timeout = self.menu_settings(ctx.guild)
         await SpotifySearchMenu(
             source=SpotifyTrackPages(items=items, detailed=detailed),
             delete_message_after=delete_after,
@@ -1214,12 +1758,7 @@ class Spotify(commands.Cog):
                     tracks = search.items
             except tekore.Unauthorised:
                 return await ctx.send(_("I am not authorized to perform this action for you."))
-            if ctx.guild:
-                delete_after = await self.config.guild(ctx.guild).delete_message_after()
-                clear_after = await self.config.guild(ctx.guild).clear_reactions_after()
-                timeout = await self.config.guild(ctx.guild).menu_timeout()
-            else:
-                delete_after, clear_after, timeout = False, True, 120
+            delete_after, clear_after, timeout = self.menu_settings(ctx.guild)
         await SpotifySearchMenu(
             source=SpotifyRecentSongPages(tracks=tracks, detailed=detailed),
             delete_message_after=delete_after,
@@ -1246,12 +1785,7 @@ class Spotify(commands.Cog):
                     cur = await user_spotify.current_user_top_tracks(limit=50)
             except tekore.Unauthorised:
                 return await ctx.send(_("I am not authorized to perform this action for you."))
-            if ctx.guild:
-                delete_after = await self.config.guild(ctx.guild).delete_message_after()
-                clear_after = await self.config.guild(ctx.guild).clear_reactions_after()
-                timeout = await self.config.guild(ctx.guild).menu_timeout()
-            else:
-                delete_after, clear_after, timeout = False, True, 120
+            delete_after, clear_after, timeout = self.menu_settings(ctx.guild)
             tracks = cur.items
         await SpotifyBaseMenu(
             source=SpotifyTopTracksPages(tracks),
@@ -1279,12 +1813,7 @@ class Spotify(commands.Cog):
                     cur = await user_spotify.current_user_top_artists(limit=50)
             except tekore.Unauthorised:
                 return await ctx.send(_("I am not authorized to perform this action for you."))
-            if ctx.guild:
-                delete_after = await self.config.guild(ctx.guild).delete_message_after()
-                clear_after = await self.config.guild(ctx.guild).clear_reactions_after()
-                timeout = await self.config.guild(ctx.guild).menu_timeout()
-            else:
-                delete_after, clear_after, timeout = False, True, 120
+            delete_after, clear_after, timeout = self.menu_settings(ctx.guild)
             artists = cur.items
         await SpotifyBaseMenu(
             source=SpotifyTopArtistsPages(artists),
@@ -1309,12 +1838,7 @@ class Spotify(commands.Cog):
             user_spotify = tekore.Spotify(sender=self._sender)
             with user_spotify.token_as(user_token):
                 playlists = await user_spotify.new_releases(limit=50)
-            if ctx.guild:
-                delete_after = await self.config.guild(ctx.guild).delete_message_after()
-                clear_after = await self.config.guild(ctx.guild).clear_reactions_after()
-                timeout = await self.config.guild(ctx.guild).menu_timeout()
-            else:
-                delete_after, clear_after, timeout = False, True, 120
+            delete_after, clear_after, timeout = self.menu_settings(ctx.guild)
             playlist_list = playlists.items
         await SpotifySearchMenu(
             source=SpotifyNewPages(playlist_list),
@@ -1511,40 +2035,37 @@ class Spotify(commands.Cog):
                     )
                     return
                 if url_or_playlist_name:
-                    cur = await user_spotify.followed_playlists(limit=50)
-                    playlists = cur.items
-                    while len(playlists) < cur.total:
-                        new = await user_spotify.followed_playlists(
-                            limit=50, offset=len(playlists)
-                        )
-                        for p in new.items:
-                            playlists.append(p)
-                    for playlist in playlists:
-                        if url_or_playlist_name.lower() in playlist.name.lower():
-                            await user_spotify.playback_start_context(playlist.uri)
-                            await ctx.react_quietly(
-                                emoji_handler.get_emoji(
-                                    "next", ctx.channel.permissions_for(ctx.me).use_external_emojis
-                                )
+                    playlists = await self.get_playlist_index(ctx.author, user_spotify)
+                    for playlist in playlists.search(url_or_playlist_name, limit=1):
+                        await user_spotify.playback_start_context(playlist.uri)
+                        await ctx.react_quietly(
+                            emoji_handler.get_emoji(
+                                "next", ctx.channel.permissions_for(ctx.me).use_external_emojis
                             )
-                            return
-                    saved_tracks = await user_spotify.saved_tracks(limit=50)
-                    for track in saved_tracks.items:
-                        if (
-                            url_or_playlist_name.lower() in track.track.name.lower()
-                            or url_or_playlist_name.lower()
-                            in ", ".join(a.name for a in track.track.artists)
-                        ):
-                            await user_spotify.playback_start_tracks([track.track.id])
-                            await ctx.react_quietly(
-                                emoji_handler.get_emoji(
-                                    "next", ctx.channel.permissions_for(ctx.me).use_external_emojis
-                                )
+                        )
+                        return
+                    library = await self.get_library(ctx.author, user_spotify)
+                    if library is not None:
+                        saved_tracks = library.index
+                    else:
+                        saved_tracks = await self.get_saved_tracks_index(ctx.author, user_spotify)
+                    for track in saved_tracks.search(url_or_playlist_name, limit=1):
+                        await user_spotify.playback_start_tracks([track.id])
+                        await ctx.react_quietly(
+                            emoji_handler.get_emoji(
+                                "next", ctx.channel.permissions_for(ctx.me).use_external_emojis
                             )
-                            return
+                        )
+                        return
                 else:
-                    cur = await user_spotify.saved_tracks(limit=50)
-                    await user_spotify.playback_start_tracks([t.track.id for t in cur.items])
+                    library = await self.get_library(ctx.author, user_spotify)
+                    if library:
+                        tracks = [t.id for t in library.tracks]
+                        tracks = random.sample(tracks, min(len(tracks), 100))
+                    else:
+                        cur = await user_spotify.saved_tracks(limit=50)
+                        tracks = [t.track.id for t in cur.items]
+                    await user_spotify.playback_start_tracks(tracks)
                     await ctx.react_quietly(
                         emoji_handler.get_emoji(
                             "next", ctx.channel.permissions_for(ctx.me).use_external_emojis
@@ -1944,6 +2465,81 @@ class Spotify(commands.Cog):
                 _("An exception has occured, please contact the bot owner for more assistance.")
             )
 
+    @spotify_library.command(name="sync")
+    async def spotify_library_sync(self, ctx: commands.Context):
+        """
+        Keep a local copy of your saved tracks for searching
+
+        The first sync fetches your whole library, after that only
+        newly saved tracks are fetched. `[p]spotify play` will then search
+        and shuffle your whole library instead of your 50 newest tracks.
+        """
+        user_token = await self.get_user_auth(ctx)
+        if not user_token:
+            return await ctx.send(_("You need to authorize me to interact with spotify."))
+        await self.config.user(ctx.author).library_index.set(True)
+        try:
+            user_spotify = tekore.Spotify(sender=self._sender)
+            async with ctx.typing():
+                with user_spotify.token_as(user_token):
+                    library = await self.get_library(ctx.author, user_spotify, force=True)
+        except tekore.Unauthorised:
+            await ctx.send(_("I am not authorized to perform this action for you."))
+        except tekore.HTTPError:
+            log.exception("Error grabing user info from spotify")
+            await ctx.send(
+                _("An exception has occured, please contact the bot owner for more assistance.")
+            )
+        else:
+            await ctx.send(
+                _("I have indexed {count} of your saved tracks.").format(count=len(library))
+            )
+
+    @spotify_library.command(name="search")
+    async def spotify_library_search(self, ctx: commands.Context, *, query: str):
+        """
+        Search your saved tracks by title or artist
+
+        Requires `[p]spotify library sync` to have been run first.
+        """
+        if not await self.config.user(ctx.author).library_index():
+            return await ctx.send(
+                _("Run `{prefix}spotify library sync` first.").format(prefix=ctx.clean_prefix)
+            )
+        user_token = await self.get_user_auth(ctx)
+        if not user_token:
+            return await ctx.send(_("You need to authorize me to interact with spotify."))
+        try:
+            user_spotify = tekore.Spotify(sender=self._sender)
+            with user_spotify.token_as(user_token):
+                library = await self.get_library(ctx.author, user_spotify)
+        except tekore.Unauthorised:
+            return await ctx.send(_("I am not authorized to perform this action for you."))
+        except tekore.HTTPError:
+            log.exception("Error grabing user info from spotify")
+            return await ctx.send(
+                _("An exception has occured, please contact the bot owner for more assistance.")
+            )
+        tracks = library.search(query, limit=10)
+        if not tracks:
+            return await ctx.send(
+                _("No saved tracks found matching `{query}`.").format(query=query)
+            )
+        msg = "\n".join(
+            f"{c}. [{t.name}](https://open.spotify.com/track/{t.id}) - {', '.join(t.artists)}"
+            for c, t in enumerate(tracks, 1)
+        )
+        await ctx.maybe_send_embed(msg)
+
+    @spotify_library.command(name="forget")
+    async def spotify_library_forget(self, ctx: commands.Context):
+        """
+        Stop indexing your saved tracks and delete the local copy
+        """
+        await self.config.user(ctx.author).library_index.set(False)
+        await self.delete_library(ctx.author.id)
+        await ctx.send(_("I have deleted the local copy of your saved tracks."))
+
     @spotify_playlist.command(name="featured")
     @commands.bot_has_permissions(read_message_history=True, add_reactions=True, embed_links=True)
     async def spotify_playlist_featured(self, ctx: commands.Context):
@@ -1960,12 +2556,7 @@ class Spotify(commands.Cog):
                     playlists = await user_spotify.featured_playlists(limit=50)
             except tekore.Unauthorised:
                 return await ctx.send(_("I am not authorized to perform this action for you."))
-            if ctx.guild:
-                delete_after = await self.config.guild(ctx.guild).delete_message_after()
-                clear_after = await self.config.guild(ctx.guild).clear_reactions_after()
-                timeout = await self.config.guild(ctx.guild).menu_timeout()
-            else:
-                delete_after, clear_after, timeout = False, True, 120
+            delete_after, clear_after, timeout = self.menu_settings(ctx.guild)
             playlist_list = playlists[1].items
         await SpotifySearchMenu(
             source=SpotifyNewPages(playlist_list),
@@ -1994,20 +2585,10 @@ class Spotify(commands.Cog):
             try:
                 user_spotify = tekore.Spotify(sender=self._sender)
                 with user_spotify.token_as(user_token):
-                    cur = await user_spotify.followed_playlists(limit=50)
-                    playlists = cur.items
-                    while len(playlists) < cur.total:
-                        new = await user_spotify.followed_playlists(limit=50, offset=len(playlists))
-                        for p in new.items:
-                            playlists.append(p)
+                    playlists = await self.get_user_playlists(ctx.author, user_spotify)
             except tekore.Unauthorised:
                 return await ctx.send(_("I am not authorized to perform this action for you."))
-            if ctx.guild:
-                delete_after = await self.config.guild(ctx.guild).delete_message_after()
-                clear_after = await self.config.guild(ctx.guild).clear_reactions_after()
-                timeout = await self.config.guild(ctx.guild).menu_timeout()
-            else:
-                delete_after, clear_after, timeout = False, True, 120
+            delete_after, clear_after, timeout = self.menu_settings(ctx.guild)
             show_private = await self.config.user(ctx.author).show_private() or isinstance(
                 ctx.channel, discord.DMChannel
             )
@@ -2042,20 +2623,10 @@ class Spotify(commands.Cog):
             try:
                 user_spotify = tekore.Spotify(sender=self._sender)
                 with user_spotify.token_as(user_token):
-                    cur = await user_spotify.followed_playlists(limit=50)
-                    playlists = cur.items
-                    while len(playlists) < cur.total:
-                        new = await user_spotify.followed_playlists(limit=50, offset=len(playlists))
-                        for p in new.items:
-                            playlists.append(p)
+                    playlists = await self.get_user_playlists(ctx.author, user_spotify)
             except tekore.Unauthorised:
                 return await ctx.send(_("I am not authorized to perform this action for you."))
-            if ctx.guild:
-                delete_after = await self.config.guild(ctx.guild).delete_message_after()
-                clear_after = await self.config.guild(ctx.guild).clear_reactions_after()
-                timeout = await self.config.guild(ctx.guild).menu_timeout()
-            else:
-                delete_after, clear_after, timeout = False, True, 120
+            delete_after, clear_after, timeout = self.menu_settings(ctx.guild)
             show_private = await self.config.user(ctx.author).show_private() or isinstance(
                 ctx.channel, discord.DMChannel
             )
@@ -2101,6 +2672,7 @@ class Spotify(commands.Cog):
             with user_spotify.token_as(user_token):
                 user = await user_spotify.current_user()
                 await user_spotify.playlist_create(user.id, name, public, description)
+                self.invalidate_user_playlists(ctx.author)
                 await ctx.tick()
         except tekore.Unauthorised:
             await ctx.send(_("I am not authorized to perform this action for you."))
@@ -2129,50 +2701,12 @@ class Spotify(commands.Cog):
         Add 1 (or more) tracks to a spotify playlist
 
         `<name>` The name of playlist you want to add songs to
-        `<to_remove>` The song links or URI's you want to add
+        `<to_add>` The song links or URI's you want to add
+
+        Playlist links add every track from that playlist and you can
+        attach a text file with one song link or URI per line.
         """
-        tracks = []
-        new_uri = ""
-        for match in to_add:
-            new_uri = f"spotify:{match.group(2)}:{match.group(3)}"
-            if match.group(2) == "track":
-                tracks.append(new_uri)
-        if not tracks:
-            return await ctx.send(
-                _("You did not provide any tracks for me to add to the playlist.")
-            )
-        user_token = await self.get_user_auth(ctx)
-        if not user_token:
-            return await ctx.send(_("You need to authorize me to interact with spotify."))
-        try:
-            user_spotify = tekore.Spotify(sender=self._sender)
-            with user_spotify.token_as(user_token):
-                cur = await user_spotify.followed_playlists(limit=50)
-                playlists = cur.items
-                while len(playlists) < cur.total:
-                    new = await user_spotify.followed_playlists(limit=50, offset=len(playlists))
-                    for p in new.items:
-                        playlists.append(p)
-                for playlist in playlists:
-                    if name.lower() == playlist.name.lower():
-                        await user_spotify.playlist_add(playlist.id, tracks)
-                        await ctx.tick()
-                        return
-            await ctx.send(_("I could not find a playlist matching {name}.").format(name=name))
-        except tekore.Unauthorised:
-            await ctx.send(_("I am not authorized to perform this action for you."))
-        except tekore.NotFound:
-            await ctx.send(_("I could not find an active device to play songs on."))
-        except tekore.Forbidden as e:
-            if "non-premium" in str(e):
-                await ctx.send(_("This action is prohibited for non-premium users."))
-            else:
-                await ctx.send(_("I couldn't perform that action for you."))
-        except tekore.HTTPError:
-            log.exception("Error grabing user info from spotify")
-            await ctx.send(
-                _("An exception has occured, please contact the bot owner for more assistance.")
-            )
+        await self._bulk_playlist_edit(ctx, name, to_add, remove=False)
 
     @spotify_playlist.command(name="remove")
     @commands.bot_has_permissions(embed_links=True, add_reactions=True)
@@ -2187,49 +2721,306 @@ class Spotify(commands.Cog):
 
         `<name>` The name of playlist you want to remove songs from
         `<to_remove>` The song links or URI's you want to have removed
+
+        Playlist links remove every track in that playlist and you can
+        attach a text file with one song link or URI per line.
         """
-        tracks = []
-        new_uri = ""
-        for match in to_remove:
-            new_uri = f"spotify:{match.group(2)}:{match.group(3)}"
+        await self._bulk_playlist_edit(ctx, name, to_remove, remove=True)
+
+    async def _bulk_track_uris(
+        self, ctx: commands.Context, user_spotify: tekore.Spotify, matches: Iterable[re.Match]
+    ) -> AsyncIterator[str]:
+        """
+        Yield the track URIs given to a command
+
+        Playlists are streamed a few pages ahead so their tracks can be
+        sent to Spotify while later pages are still being fetched.
+        This must be iterated inside `user_spotify.token_as()`.
+        """
+        for match in matches:
             if match.group(2) == "track":
-                tracks.append(new_uri)
-        if not tracks:
-            return await ctx.send(
-                _("You did not provide any tracks for me to add to the playlist.")
-            )
+                yield f"spotify:track:{match.group(3)}"
+            elif match.group(2) == "playlist":
+                items = iter_playlist_items(user_spotify, match.group(3))
+                try:
+                    async for item in items:
+                        if item.track is not None and not item.is_local:
+                            yield item.track.uri
+                finally:
+                    # cancels the pages it's fetching ahead if we stop early
+                    await items.aclose()
+        for attachment in ctx.message.attachments:
+            content = (await attachment.read()).decode("utf8", errors="ignore")
+            for match in SPOTIFY_RE.finditer(content):
+                if match.group(2) == "track":
+                    yield f"spotify:track:{match.group(3)}"
+
+    async def _bulk_playlist_edit(
+        self, ctx: commands.Context, name: str, matches: Iterable[re.Match], remove: bool
+    ) -> None:
+        """
+        Add or remove any number of tracks from one of the authors playlists
+
+        Spotify only accepts 100 tracks per request so the tracks are sent
+        in chunks one after another, keeping their order in the playlist.
+        The next chunk is collected in a task while the previous request is
+        in flight. Progress is shown for anything larger than a single chunk.
+        """
+        if remove:
+            progress_msg = _("Removed {count} tracks from {name}.")
+            no_tracks = _("You did not provide any tracks for me to remove from the playlist.")
+        else:
+            progress_msg = _("Added {count} tracks to {name}.")
+            no_tracks = _("You did not provide any tracks for me to add to the playlist.")
+        if not matches and not ctx.message.attachments:
+            return await ctx.send(no_tracks)
         user_token = await self.get_user_auth(ctx)
         if not user_token:
             return await ctx.send(_("You need to authorize me to interact with spotify."))
+        count = 0
+        progress = None
+        playlist = None
+        error = None
+        last_update = time.monotonic()
         try:
             user_spotify = tekore.Spotify(sender=self._sender)
             with user_spotify.token_as(user_token):
-                cur = await user_spotify.followed_playlists(limit=50)
-                playlists = cur.items
-                while len(playlists) < cur.total:
-                    new = await user_spotify.followed_playlists(limit=50, offset=len(playlists))
-                    for p in new.items:
-                        playlists.append(p)
-                for playlist in playlists:
-                    if name.lower() == playlist.name.lower():
-                        await user_spotify.playlist_remove(playlist.id, tracks)
-                        await ctx.tick()
-                        return
-            await ctx.send(_("I could not find a playlist matching {name}.").format(name=name))
+                playlists = await self.get_playlist_index(ctx.author, user_spotify)
+                matches_found = playlists.exact(name)
+                if not matches_found:
+                    return await ctx.send(self._playlist_not_found(name, playlists))
+                playlist = matches_found[0]
+                uris = self._bulk_track_uris(ctx, user_spotify, matches)
+                chunks_iter = achunks(uris, 100)
+
+                async def next_chunk() -> Optional[List[str]]:
+                    try:
+                        return await chunks_iter.__anext__()
+                    except StopAsyncIteration:
+                        return None
+
+                pending = asyncio.ensure_future(next_chunk())
+                try:
+                    while (chunk := await pending) is not None:
+                        pending = asyncio.ensure_future(next_chunk())
+                        if remove:
+                            await user_spotify.playlist_remove(playlist.id, chunk)
+                        else:
+                            await user_spotify.playlist_add(playlist.id, chunk)
+                        count += len(chunk)
+                        if len(chunk) == 100 and time.monotonic() - last_update > 2:
+                            msg = progress_msg.format(count=count, name=playlist.name) + " ..."
+                            if progress is None:
+                                progress = await ctx.send(msg)
+                            else:
+                                await progress.edit(content=msg)
+                            last_update = time.monotonic()
+                finally:
+                    # the generators can't be closed while the task is still inside them
+                    pending.cancel()
+                    with contextlib.suppress(asyncio.CancelledError, Exception):
+                        await pending
+                    await chunks_iter.aclose()
+                    await uris.aclose()
         except tekore.Unauthorised:
-            await ctx.send(_("I am not authorized to perform this action for you."))
+            error = _("I am not authorized to perform this action for you.")
         except tekore.NotFound:
-            await ctx.send(_("I could not find an active device to play songs on."))
+            error = _("I could not find that playlist or one of those tracks.")
         except tekore.Forbidden as e:
             if "non-premium" in str(e):
-                await ctx.send(_("This action is prohibited for non-premium users."))
+                error = _("This action is prohibited for non-premium users.")
             else:
-                await ctx.send(_("I couldn't perform that action for you."))
+                error = _("I couldn't perform that action for you.")
         except tekore.HTTPError:
             log.exception("Error grabing user info from spotify")
+            error = _(
+                "An exception has occured, please contact the bot owner for more assistance."
+            )
+        finally:
+            if count:
+                self.invalidate_user_playlists(ctx.author)
+        if error is not None:
+            if count:
+                # let them know what already made it into the playlist before the error
+                done = progress_msg.format(count=count, name=playlist.name)
+                if progress is not None:
+                    await progress.edit(content=done)
+                else:
+                    error = f"{done}\n{error}"
+            return await ctx.send(error)
+        if not count:
+            return await ctx.send(no_tracks)
+        if progress is not None:
+            await progress.edit(content=progress_msg.format(count=count, name=playlist.name))
+        else:
+            await ctx.tick()
+
+    @spotify_playlist.command(name="export")
+    @commands.bot_has_permissions(attach_files=True)
+    async def spotify_playlist_export(
+        self, ctx: commands.Context, name: str, file_format: str = "csv"
+    ):
+        """
+        Export every track in one of your playlists to a file
+
+        `<name>` The name of the playlist you want to export
+        `[file_format=csv]` Either `csv` or `json`
+        """
+        file_format = file_format.lower()
+        if file_format not in ("csv", "json"):
+            return await ctx.send(_("The file format must be either `csv` or `json`."))
+        user_token = await self.get_user_auth(ctx)
+        if not user_token:
+            return await ctx.send(_("You need to authorize me to interact with spotify."))
+        limit = ctx.guild.filesize_limit if ctx.guild else 8 * 1024 * 1024
+        # rows are written out as pages arrive so only a few pages are ever held in memory
+        with tempfile.TemporaryFile() as outfile:
+            text = io.TextIOWrapper(outfile, encoding="utf8", newline="")
+            try:
+                user_spotify = tekore.Spotify(sender=self._sender)
+                async with ctx.typing():
+                    with user_spotify.token_as(user_token):
+                        playlists = await self.get_playlist_index(ctx.author, user_spotify)
+                        matches = playlists.exact(name)
+                        if not matches:
+                            return await ctx.send(self._playlist_not_found(name, playlists))
+                        playlist = matches[0]
+                        items = iter_playlist_items(user_spotify, playlist.id)
+                        count = await self._write_playlist_export(text, items, file_format)
+            except tekore.Unauthorised:
+                return await ctx.send(_("I am not authorized to perform this action for you."))
+            except tekore.HTTPError:
+                log.exception("Error grabing user info from spotify")
+                return await ctx.send(
+                    _(
+                        "An exception has occured, please contact "
+                        "the bot owner for more assistance."
+                    )
+                )
+            text.flush()
+            text.detach()
+            if outfile.tell() > limit:
+                return await ctx.send(_("That playlist is too large to upload here."))
+            outfile.seek(0)
             await ctx.send(
+                _("Exported {count} tracks from {name}.").format(count=count, name=playlist.name),
+                file=discord.File(outfile, filename=f"{playlist.id}.{file_format}"),
+            )
+
+    @staticmethod
+    async def _write_playlist_export(
+        text: io.TextIOBase, items: AsyncIterator[tekore.model.PlaylistTrack], file_format: str
+    ) -> int:
+        fields = ["position", "name", "artists", "album", "duration_ms", "added_at", "uri"]
+        if file_format == "csv":
+            writer = csv.DictWriter(text, fieldnames=fields)
+            writer.writeheader()
+        else:
+            text.write("[")
+        count = 0
+        async for item in items:
+            track = item.track
+            if track is None:
+                continue
+            album = getattr(track, "album", None)
+            row = {
+                "position": count,
+                "name": track.name,
+                "artists": ", ".join(a.name for a in getattr(track, "artists", [])),
+                "album": album.name if album else "",
+                "duration_ms": track.duration_ms,
+                "added_at": item.added_at.isoformat() if item.added_at else "",
+                "uri": track.uri,
+            }
+            if file_format == "csv":
+                writer.writerow(row)
+            else:
+                text.write(("," if count else "") + "\n" + json.dumps(row))
+            count += 1
+        if file_format == "json":
+            text.write("\n]\n")
+        return count
+
+    @spotify_playlist.command(name="stats")
+    @commands.bot_has_permissions(embed_links=True)
+    async def spotify_playlist_stats(self, ctx: commands.Context, name: str):
+        """
+        Summarize the audio features of every track in one of your playlists
+
+        `<name>` The name of the playlist you want stats for
+        """
+        if not NUMPY:
+            return await ctx.send(
+                _(
+                    "This command requires `numpy` which should have been installed "
+                    "with the cog, the bot owner can install it with `{prefix}pipinstall numpy`."
+                ).format(prefix=ctx.clean_prefix)
+            )
+        user_token = await self.get_user_auth(ctx)
+        if not user_token:
+            return await ctx.send(_("You need to authorize me to interact with spotify."))
+        try:
+            user_spotify = tekore.Spotify(sender=self._sender)
+            async with ctx.typing():
+                with user_spotify.token_as(user_token):
+                    playlists = await self.get_playlist_index(ctx.author, user_spotify)
+                    matches = playlists.exact(name)
+                    if not matches:
+                        return await ctx.send(self._playlist_not_found(name, playlists))
+                    playlist = matches[0]
+                    items = iter_playlist_items(user_spotify, playlist.id)
+                    track_ids = (
+                        item.track.id
+                        async for item in items
+                        if item.track is not None
+                        and item.track.type == "track"
+                        and not item.is_local
+                    )
+                    stats = PlaylistStats()
+                    # features are requested as soon as a chunk of ids is ready and
+                    # added to the stats as they come back, in whatever order
+                    pending: Set[asyncio.Task] = set()
+                    try:
+                        async for chunk in achunks(track_ids, AudioFeaturesCache.MAX_IDS):
+                            if len(pending) >= 8:
+                                done, pending = await asyncio.wait(
+                                    pending, return_when=asyncio.FIRST_COMPLETED
+                                )
+                                for task in done:
+                                    stats.add(task.result())
+                            pending.add(
+                                asyncio.ensure_future(
+                                    self._audio_features.get_many(user_spotify, chunk)
+                                )
+                            )
+                        for features in await asyncio.gather(*pending):
+                            stats.add(features)
+                    finally:
+                        for task in pending:
+                            task.cancel()
+                        # stops the pages iter_playlist_items is fetching ahead
+                        await track_ids.aclose()
+                        await items.aclose()
+        except tekore.Unauthorised:
+            return await ctx.send(_("I am not authorized to perform this action for you."))
+        except tekore.HTTPError:
+            log.exception("Error grabing user info from spotify")
+            return await ctx.send(
                 _("An exception has occured, please contact the bot owner for more assistance.")
             )
+        if not stats.count:
+            return await ctx.send(
+                _("There are no tracks with audio features in {name}.").format(name=playlist.name)
+            )
+        em = discord.Embed(
+            title=_("Stats for {name}").format(name=playlist.name),
+            url=playlist.external_urls.get("spotify"),
+            description=box(stats.render()),
+            color=await ctx.embed_color(),
+        )
+        if playlist.images:
+            em.set_thumbnail(url=playlist.images[0].url)
+        await ctx.send(embed=em)
 
     @spotify_playlist.command(name="follow")
     @commands.bot_has_permissions(embed_links=True, add_reactions=True)
@@ -2261,6 +3052,7 @@ class Spotify(commands.Cog):
             with user_spotify.token_as(user_token):
                 for playlist in tracks:
                     await user_spotify.playlist_follow(playlist, public)
+                self.invalidate_user_playlists(ctx.author)
                 await ctx.tick()
         except tekore.Unauthorised:
             await ctx.send(_("I am not authorized to perform this action for you."))
@@ -2346,12 +3138,7 @@ class Spotify(commands.Cog):
                     tracks = search.items
             except tekore.Unauthorised:
                 await ctx.send(_("I am not authorized to perform this action for you."))
-            if ctx.guild:
-                delete_after = await self.config.guild(ctx.guild).delete_message_after()
-                clear_after = await self.config.guild(ctx.guild).clear_reactions_after()
-                timeout = await self.config.guild(ctx.guild).menu_timeout()
-            else:
-                delete_after, clear_after, timeout = False, True, 120
+            delete_after, clear_after, timeout = self.menu_settings(ctx.guild)
         await SpotifySearchMenu(
             source=SpotifyAlbumPages(tracks, False),
             delete_message_after=delete_after,